@@ -6,6 +6,7 @@ import time
 import re
 import os
 import asyncio
+import contextlib
 
 
 mixinKeyEncTab = [
@@ -43,6 +44,15 @@ def sanitize_filename(name):
 def unescape_url(url):
     return re.sub(r"\\u([0-9a-fA-F]{4})", lambda m: chr(int(m.group(1), 16)), url)
 
+@contextlib.asynccontextmanager
+async def session_scope(session=None):
+    "复用调用方传入的 aiohttp 会话；未传入时临时创建一个，用完关闭"
+    if session is not None:
+        yield session
+        return
+    async with aiohttp.ClientSession() as own_session:
+        yield own_session
+
 async def fetch_json(session, url, **kwargs):
     async with session.get(url, **kwargs) as resp:
         resp.raise_for_status()
@@ -51,7 +61,7 @@ async def fetch_json(session, url, **kwargs):
 async def download_file(session, url, path, headers):
     async with session.get(url, headers=headers) as resp:
         resp.raise_for_status()
-        with open(path, "wb") as f:
+        with open(path, "wb", buffering=1 << 20) as f:
             async for chunk in resp.content.iter_chunked(8192):
                 f.write(chunk)
 
@@ -59,7 +69,7 @@ async def download_audio_by_url(session, url, save_path, headers):
     print(f"[音频下载] 正在下载音频流: {url}")
     async with session.get(url, headers=headers) as resp:
         resp.raise_for_status()
-        with open(save_path, "wb") as f:
+        with open(save_path, "wb", buffering=1 << 20) as f:
             async for chunk in resp.content.iter_chunked(8192):
                 f.write(chunk)
     print(f"[音频下载] 音频流已保存为: {save_path}")
@@ -76,13 +86,13 @@ async def getWbiKeys(session, headers):
         sub_key = sub_url.rsplit("/", 1)[1].split(".")[0]
         return img_key, sub_key
 
-async def fetch_bilibili_video_info(bvid, cookie=None):
+async def fetch_bilibili_video_info(bvid, cookie=None, session=None):
     headers = {
         "User-Agent": "Mozilla/5.0",
         "referer": "https://www.bilibili.com",
         "cookie": cookie or ""
     }
-    async with aiohttp.ClientSession() as session:
+    async with session_scope(session) as session:
         info_url = f"https://api.bilibili.com/x/web-interface/view?bvid={bvid}"
         info_data = await fetch_json(session, info_url, headers=headers)
         if info_data["code"] == 0:
@@ -104,7 +114,7 @@ async def fetch_bilibili_video_info(bvid, cookie=None):
         else:
             return {}
 
-async def download_bilibili_audio(bvid, save_dir, only_audio=False, cookie=None):
+async def download_bilibili_audio(bvid, save_dir, only_audio=False, cookie=None, session=None):
     # 构造headers
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
@@ -112,9 +122,9 @@ async def download_bilibili_audio(bvid, save_dir, only_audio=False, cookie=None)
         "cookie": cookie or ""
     }
     os.makedirs(save_dir, exist_ok=True)
-    async with aiohttp.ClientSession() as session:
+    async with session_scope(session) as session:
         # 获取视频信息
-        info = await fetch_bilibili_video_info(bvid, cookie=cookie)
+        info = await fetch_bilibili_video_info(bvid, cookie=cookie, session=session)
         if not info:
             print("获取视频信息失败")
             return None
@@ -177,11 +187,14 @@ async def download_bilibili_audio(bvid, save_dir, only_audio=False, cookie=None)
             output_wav = os.path.join(save_dir, f"{title}.wav")
             print(f"[DASH] 正在转换音频流为: {output_wav}")
             try:
-                import asyncio
                 proc = await asyncio.create_subprocess_exec(
-                    "ffmpeg", "-y", "-i", audio_path, "-vn", "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "2", output_wav
+                    "ffmpeg", "-y", "-i", audio_path, "-vn", "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "2", output_wav,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
                 )
-                await proc.communicate()
+                _, stderr = await proc.communicate()
+                if proc.returncode != 0:
+                    raise RuntimeError(stderr.decode(errors="ignore").strip()[-500:])
                 print(f"[DASH] 转换完成: {output_wav}")
                 os.remove(audio_path)
             except Exception as e:
@@ -201,21 +214,21 @@ async def download_bilibili_audio(bvid, save_dir, only_audio=False, cookie=None)
             print(f"[DASH] 无损音频流已保存为: {flac_path}")
         return audio_path
 
-async def bilibili_download_api(bvid, save_dir, qn="80", fnval="16", only_audio=False, cookie=None):
+async def bilibili_download_api(bvid, save_dir, qn="80", fnval="16", only_audio=False, cookie=None, session=None):
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
         "referer": "https://www.bilibili.com",
         "cookie": cookie or ""
     }
     os.makedirs(save_dir, exist_ok=True)
-    # 获取视频信息
-    info = await fetch_bilibili_video_info(bvid, cookie=cookie)
-    if not info:
-        print("获取视频信息失败")
-        return
-    cid = info["cid"]
-    title = sanitize_filename(info["title"])
-    async with aiohttp.ClientSession() as session:
+    async with session_scope(session) as session:
+        # 获取视频信息
+        info = await fetch_bilibili_video_info(bvid, cookie=cookie, session=session)
+        if not info:
+            print("获取视频信息失败")
+            return
+        cid = info["cid"]
+        title = sanitize_filename(info["title"])
         img_key, sub_key = await getWbiKeys(session, headers)
         params = {
             "bvid": bvid,
@@ -237,12 +250,12 @@ async def bilibili_download_api(bvid, save_dir, qn="80", fnval="16", only_audio=
             dash = data["dash"]
             video_url = unescape_url(dash["video"][0]["baseUrl"])
             if only_audio:
-                await download_bilibili_audio(bvid, save_dir, only_audio=True, cookie=cookie)
+                await download_bilibili_audio(bvid, save_dir, only_audio=True, cookie=cookie, session=session)
             else:
                 video_path = os.path.join(save_dir, "video.m4s")
                 print("[DASH] 正在下载视频流...")
                 await download_file(session, video_url, video_path, headers)
-                await download_bilibili_audio(bvid, save_dir, only_audio=False, cookie=cookie)
+                await download_bilibili_audio(bvid, save_dir, only_audio=False, cookie=cookie, session=session)
                 print(f"[DASH] 视频流已保存为: {video_path}")
                 audio_path = os.path.join(save_dir, "audio.m4s")
                 print(f"[DASH] 音频流已保存为: {audio_path}")
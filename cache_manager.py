@@ -11,7 +11,8 @@ import json
 import time
 import hashlib
 import shutil
-from typing import Optional, Dict
+import tempfile
+from typing import Optional, Dict, Tuple
 from astrbot.core import logger
 
 class CacheManager:
@@ -29,11 +30,13 @@ class CacheManager:
         self.max_cache_size = max_cache_size
         self.max_cache_age = max_cache_age
         self.index_file = os.path.join(cache_dir, "cache_index.json")
+        self.stem_cache_dir = os.path.join(cache_dir, "stems")
         self._init_cache()
 
     def _init_cache(self):
         """初始化缓存目录和索引"""
         os.makedirs(self.cache_dir, exist_ok=True)
+        os.makedirs(self.stem_cache_dir, exist_ok=True)
         if not os.path.exists(self.index_file):
             self._save_index({})
         self._clean_expired_cache()
@@ -77,22 +80,37 @@ class CacheManager:
             with open(input_file, "rb") as f:
                 file_content = f.read(1024*1024)
 
-            # 组合所有参数
-            params = {
-                "file_hash": hashlib.md5(file_content).hexdigest(),
-                "speaker_id": str(speaker_id),
-                "pitch_adjust": str(pitch_adjust)
-            }
-            params.update({k: str(v) for k, v in kwargs.items()})
-
-            # 生成参数字符串并计算哈希
-            params_str = json.dumps(params, sort_keys=True)
-            return hashlib.md5(params_str.encode()).hexdigest()
+            return self._cache_key_from_hash(hashlib.md5(file_content).hexdigest(), speaker_id, pitch_adjust, **kwargs)
 
         except Exception as e:
             logger.error(f"生成缓存键失败: {str(e)}")
             return None
 
+    @staticmethod
+    def _cache_key_from_hash(file_hash: str, speaker_id: str, pitch_adjust: int, **kwargs) -> str:
+        """由输入音频哈希与转换参数生成缓存键
+
+        Args:
+            file_hash: 输入音频的哈希
+            speaker_id: 说话人ID
+            pitch_adjust: 音调调整
+            **kwargs: 其他参数
+
+        Returns:
+            缓存键
+        """
+        # 组合所有参数
+        params = {
+            "file_hash": file_hash,
+            "speaker_id": str(speaker_id),
+            "pitch_adjust": str(pitch_adjust)
+        }
+        params.update({k: str(v) for k, v in kwargs.items()})
+
+        # 生成参数字符串并计算哈希
+        params_str = json.dumps(params, sort_keys=True)
+        return hashlib.md5(params_str.encode()).hexdigest()
+
     def _clean_expired_cache(self):
         """清理过期和超大的缓存"""
         try:
@@ -145,6 +163,36 @@ class CacheManager:
         except Exception as e:
             logger.error(f"清理缓存失败: {str(e)}")
 
+        self._clean_stem_cache()
+
+    def _clean_stem_cache(self):
+        """清理分离音轨缓存：删除过期文件，总大小超过 max_cache_size 时按最近使用时间（mtime）淘汰最旧的"""
+        try:
+            current_time = time.time()
+            total_size = 0
+            stems = []
+            with os.scandir(self.stem_cache_dir) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    if current_time - st.st_mtime > self.max_cache_age:
+                        os.remove(entry.path)
+                        continue
+                    stems.append((st.st_mtime, st.st_size, entry.path))
+                    total_size += st.st_size
+
+            if total_size > self.max_cache_size:
+                stems.sort()
+                for _, file_size, path in stems:
+                    if total_size <= self.max_cache_size:
+                        break
+                    os.remove(path)
+                    total_size -= file_size
+
+        except Exception as e:
+            logger.error(f"清理分离音轨缓存失败: {str(e)}")
+
     def get_cache(self, input_file: str, speaker_id: str, pitch_adjust: int, **kwargs) -> Optional[str]:
         """获取缓存的转换结果
 
@@ -161,23 +209,44 @@ class CacheManager:
             cache_key = self._generate_cache_key(input_file, speaker_id, pitch_adjust, **kwargs)
             if not cache_key:
                 return None
+            return self._lookup_cache(cache_key)
 
-            index = self._load_index()
-            if cache_key not in index:
-                return None
+        except Exception as e:
+            logger.error(f"获取缓存失败: {str(e)}")
+            return None
 
-            cache_file = os.path.join(self.cache_dir, cache_key + ".wav")
-            if not os.path.exists(cache_file):
-                del index[cache_key]
-                self._save_index(index)
-                return None
+    def get_cache_by_digest(self, digest: str, speaker_id: str, pitch_adjust: int, **kwargs) -> Optional[str]:
+        """根据已计算好的输入音频摘要获取缓存的转换结果，避免再次读取输入文件
 
-            return cache_file
+        Args:
+            digest: 输入音频的 SHA-256 摘要
+            speaker_id: 说话人ID
+            pitch_adjust: 音调调整
+            **kwargs: 其他参数
 
+        Returns:
+            缓存的音频文件路径，如果没有缓存则返回None
+        """
+        try:
+            return self._lookup_cache(self._cache_key_from_hash(digest, speaker_id, pitch_adjust, **kwargs))
         except Exception as e:
             logger.error(f"获取缓存失败: {str(e)}")
             return None
 
+    def _lookup_cache(self, cache_key: str) -> Optional[str]:
+        """按缓存键查找缓存文件，索引中存在但文件丢失时顺带清理索引"""
+        index = self._load_index()
+        if cache_key not in index:
+            return None
+
+        cache_file = os.path.join(self.cache_dir, cache_key + ".wav")
+        if not os.path.exists(cache_file):
+            del index[cache_key]
+            self._save_index(index)
+            return None
+
+        return cache_file
+
     def save_cache(self, input_file: str, output_file: str, speaker_id: str, pitch_adjust: int, **kwargs) -> Optional[str]:
         """保存转换结果到缓存
 
@@ -195,31 +264,150 @@ class CacheManager:
             cache_key = self._generate_cache_key(input_file, speaker_id, pitch_adjust, **kwargs)
             if not cache_key:
                 return None
+            return self._store_cache(cache_key, os.path.basename(input_file), output_file, speaker_id, pitch_adjust, kwargs)
 
-            # 复制输出文件到缓存目录
-            cache_file = os.path.join(self.cache_dir, cache_key + ".wav")
-            shutil.copy2(output_file, cache_file)
-
-            # 更新索引
-            index = self._load_index()
-            index[cache_key] = {
-                "timestamp": time.time(),
-                "input_file": os.path.basename(input_file),
-                "speaker_id": speaker_id,
-                "pitch_adjust": pitch_adjust,
-                "params": kwargs
-            }
-            self._save_index(index)
+        except Exception as e:
+            logger.error(f"保存缓存失败: {str(e)}")
+            return None
 
-            # 清理过期缓存
-            self._clean_expired_cache()
+    def save_cache_by_digest(self, digest: str, output_file: str, speaker_id: str, pitch_adjust: int, **kwargs) -> Optional[str]:
+        """根据已计算好的输入音频摘要保存转换结果到缓存
 
-            return cache_file
+        Args:
+            digest: 输入音频的 SHA-256 摘要
+            output_file: 输出文件路径
+            speaker_id: 说话人ID
+            pitch_adjust: 音调调整
+            **kwargs: 其他参数
 
+        Returns:
+            缓存的音频文件路径，失败返回None
+        """
+        try:
+            cache_key = self._cache_key_from_hash(digest, speaker_id, pitch_adjust, **kwargs)
+            return self._store_cache(cache_key, digest, output_file, speaker_id, pitch_adjust, kwargs)
         except Exception as e:
             logger.error(f"保存缓存失败: {str(e)}")
             return None
 
+    def _store_cache(self, cache_key: str, source: str, output_file: str, speaker_id: str, pitch_adjust: int, params: Dict) -> str:
+        """把输出文件链接（或复制）到缓存目录并更新索引"""
+        cache_file = os.path.join(self.cache_dir, cache_key + ".wav")
+        self.link_or_copy(output_file, cache_file)
+
+        # 更新索引
+        index = self._load_index()
+        index[cache_key] = {
+            "timestamp": time.time(),
+            "input_file": source,
+            "speaker_id": speaker_id,
+            "pitch_adjust": pitch_adjust,
+            "params": params
+        }
+        self._save_index(index)
+
+        # 清理过期缓存
+        self._clean_expired_cache()
+
+        return cache_file
+
+    @staticmethod
+    def link_or_copy(src: str, dst: str) -> None:
+        """让 dst 指向与 src 相同的内容：优先创建硬链接（不复制数据），跨文件系统或不支持时回退为复制
+
+        两者都只会被读取，共用同一份数据是安全的；任何一方被删除都不影响另一方
+
+        Args:
+            src: 源文件路径
+            dst: 目标文件路径，已存在时会被替换
+        """
+        # 每次使用唯一的临时文件名，并发保存同一缓存时互不干扰；写好后原子替换 dst
+        fd, tmp = tempfile.mkstemp(
+            prefix=f"{os.path.basename(dst)}.", suffix=".tmp", dir=os.path.dirname(dst) or "."
+        )
+        os.close(fd)
+        try:
+            try:
+                os.remove(tmp)
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+        finally:
+            # tmp 与 dst 已是同一文件的硬链接时 rename 不做任何事，tmp 会残留
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    @staticmethod
+    def file_digest(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+        """分块计算文件的 SHA-256 摘要
+
+        Args:
+            file_path: 文件路径
+            chunk_size: 每次读取的字节数
+
+        Returns:
+            十六进制摘要
+        """
+        h = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def _stem_paths(self, digest: str, preset: str = "") -> Tuple[str, str]:
+        """分离音轨缓存文件路径 (人声, 伴奏)，不同 MSST 预设的分离结果分开存放"""
+        prefix = digest
+        if preset:
+            preset_name = os.path.splitext(os.path.basename(preset))[0]
+            prefix = f"{digest}_{preset_name}"
+        return (
+            os.path.join(self.stem_cache_dir, f"{prefix}_vocal.wav"),
+            os.path.join(self.stem_cache_dir, f"{prefix}_inst.wav"),
+        )
+
+    def get_stem_cache(self, digest: str, preset: str = "") -> Optional[Tuple[str, str]]:
+        """获取缓存的 MSST 分离结果，命中时刷新文件 mtime 作为最近使用时间
+
+        Args:
+            digest: 输入音频的 SHA-256 摘要
+            preset: 分离使用的 MSST 预设
+
+        Returns:
+            (人声文件路径, 伴奏文件路径)，没有缓存则返回None
+        """
+        vocal_path, inst_path = self._stem_paths(digest, preset)
+        try:
+            os.utime(vocal_path)
+            os.utime(inst_path)
+        except OSError:
+            return None
+        return vocal_path, inst_path
+
+    def save_stem_cache(self, digest: str, vocal_file: str, inst_file: str, preset: str = "") -> Optional[Tuple[str, str]]:
+        """保存 MSST 分离结果到缓存
+
+        Args:
+            digest: 输入音频的 SHA-256 摘要
+            vocal_file: 分离后的人声文件
+            inst_file: 分离后的伴奏文件
+            preset: 分离使用的 MSST 预设
+
+        Returns:
+            (人声文件路径, 伴奏文件路径)，失败返回None
+        """
+        try:
+            vocal_path, inst_path = self._stem_paths(digest, preset)
+            self.link_or_copy(vocal_file, vocal_path)
+            self.link_or_copy(inst_file, inst_path)
+        except Exception as e:
+            logger.error(f"保存分离音轨缓存失败: {str(e)}")
+            return None
+        self._clean_stem_cache()
+        return vocal_path, inst_path
+
     def clear_cache(self):
         """清空所有缓存"""
         try:
@@ -228,6 +416,8 @@ class CacheManager:
                 file_path = os.path.join(self.cache_dir, file)
                 if os.path.isfile(file_path):
                     os.remove(file_path)
+            for file in os.listdir(self.stem_cache_dir):
+                os.remove(os.path.join(self.stem_cache_dir, file))
 
             # 重置索引
             self._save_index({})
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+/唱 命令参数解析
+只识别固定集合中的完整选项，其余参数（包括以 - 开头的歌曲名片段）按原顺序保留
+"""
+
+from typing import List, NamedTuple, Optional
+
+# 不带值的开关选项 -> 字段名
+_SWITCH_FLAGS = {"-c": "only_chorus", "-q": "quick_cut", "-nomix": "no_mix"}
+# 需要紧跟一个值的选项
+_MODEL_FLAG = "-m"
+
+
+class ConvertFlags(NamedTuple):
+    """/唱 命令的选项与剩余的位置参数"""
+
+    only_chorus: bool
+    quick_cut: bool
+    no_mix: bool
+    model_dir: Optional[str]
+    rest: List[str]
+
+
+def parse_convert_flags(tokens: List[str]) -> ConvertFlags:
+    """从参数中取出 -c / -q / -nomix / -m <模型目录> 选项
+
+    只匹配完整的参数，不解析 "-mxxx" 这类粘连写法；
+    未识别的参数原样按顺序留在 rest 中，避免歌曲名里的 "-x" 之类内容被丢弃
+
+    Args:
+        tokens: 命令参数列表
+
+    Returns:
+        解析出的选项与剩余参数
+
+    Raises:
+        ValueError: -m 后缺少模型目录
+    """
+    flags = dict.fromkeys(_SWITCH_FLAGS.values(), False)
+    model_dir = None
+    rest: List[str] = []
+    it = iter(tokens)
+    for token in it:
+        if token in _SWITCH_FLAGS:
+            flags[_SWITCH_FLAGS[token]] = True
+        elif token == _MODEL_FLAG:
+            model_dir = next(it, None)
+            if model_dir is None:
+                raise ValueError("-m 后需要指定模型目录")
+        else:
+            rest.append(token)
+    return ConvertFlags(model_dir=model_dir, rest=rest, **flags)
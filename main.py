@@ -6,11 +6,19 @@ So-Vits-SVC API 插件
 提供语音转换、MSST音频处理和网易云音乐下载功能
 """
 
-from typing import Optional, Dict, List, Tuple, Any, AsyncGenerator, cast
+from typing import Optional, Dict, List, Tuple, Set, Any, AsyncGenerator, cast
+import mmap
 import os
+import shutil
+import tempfile
 import time
 import uuid
 import aiohttp
+import aiofiles
+import aiofiles.os
+import contextlib
+import hashlib
+import json
 from dataclasses import field
 from pydantic import Field
 from pydantic.dataclasses import dataclass
@@ -29,21 +37,48 @@ from .netease_api import NeteaseMusicAPI
 from . import bilibili_api
 from .qqmusic_api import QQMusicAPI
 from .cache_manager import CacheManager
+from .convert_args import parse_convert_flags
 from .douyin_audio_downloader import DouyinAudioAPI
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from astrbot.api.event import filter
-from pedalboard._pedalboard import Pedalboard
-from pedalboard import Mix, Gain, HighpassFilter, PeakFilter, HighShelfFilter, Delay, Invert, Compressor, Reverb, Limiter
-from pedalboard.io import AudioFile
 import numpy as np
 import psutil
 import traceback
-from pydub import AudioSegment
-from .song import detect_chorus_api
 import astrbot.api.message_components as Comp
 import re
 
+# 可选依赖：安装 orjson 后用其解析服务端返回的 JSON，未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# pedalboard 会加载 JUCE/libsndfile 等原生库，首次混音时再导入
+_pedalboard = None
+
+def _get_pedalboard():
+    """按需导入 pedalboard，导入后缓存模块对象"""
+    global _pedalboard
+    if _pedalboard is None:
+        import pedalboard
+        import pedalboard.io
+        _pedalboard = pedalboard
+    return _pedalboard
+
+def _create_http_session() -> aiohttp.ClientSession:
+    """创建插件共用的 HTTP 会话（复用连接池与 DNS 缓存）"""
+    connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector)
+
+
+# MSST 分离推理耗时不定：不限制总时长，只限制连接和单次读取，读取停滞时尽快失败重试
+MSST_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=30, sock_connect=30, sock_read=600)
+
+# 流式写入音频时的文件缓冲区大小：网络分块较小时先在缓冲区合并，减少 write 系统调用次数
+AUDIO_WRITE_BUFFERING = 1 << 20
+
 def extract_douyin_urls(text: str) -> List[str]:
     """
     从文本中提取抖音链接
@@ -89,6 +124,12 @@ def extract_douyin_url(text: str) -> Optional[str]:
 class MSSTProcessor:
     """MSST 音频处理器"""
 
+    # 不超过该大小（字节）的下载直接整体读取写入，超过则分块流式写入
+    BULK_DOWNLOAD_THRESHOLD = 2 * 1024 * 1024
+
+    # 预设列表缓存时间（秒）
+    PRESETS_CACHE_TTL = 60.0
+
     def __init__(self, api_url: str = "http://localhost:9000"):
         """初始化 MSST 处理器
 
@@ -98,33 +139,60 @@ class MSSTProcessor:
         self.api_url = api_url
         self.session = None
         self.available_presets = []
+        self._preset_set: set[str] = set()  # 预设名集合，用于 O(1) 判断
+        self._first_json_preset: Optional[str] = None  # 首选预设不存在时的回退预设
+        self._presets_cache_ts = 0.0
         self.batch_size = None  # 将由get_optimal_batch_size自动设置
         self.use_tta = False
         self.force_cpu = False
+        self._ensured_dirs: set[str] = set()  # 已确认存在的输出目录
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取复用的 HTTP 会话，未创建或已关闭时重新创建"""
+        if self.session is None or self.session.closed:
+            self.session = _create_http_session()
+        return self.session
+
+    async def close(self):
+        """关闭 HTTP 会话"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
 
     async def initialize(self):
         """初始化处理器，获取预设列表"""
-        self.available_presets = await self.get_presets()
+        await self.get_presets()
 
     async def get_presets(self) -> List[str]:
-        """获取可用的预设列表
+        """获取可用的预设列表，成功结果缓存 PRESETS_CACHE_TTL 秒
 
         Returns:
             预设文件列表
         """
+        now = time.monotonic()
+        if self.available_presets and now - self._presets_cache_ts < self.PRESETS_CACHE_TTL:
+            return self.available_presets
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.api_url}/presets") as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get("status") == "success":
-                            return result.get("presets", [])
-            logger.error(f"获取预设列表失败: {response.text}")
+            session = await self.get_session()
+            async with session.get(f"{self.api_url}/presets") as response:
+                if response.status == 200:
+                    result = await response.json(loads=_json_loads)
+                    if result.get("status") == "success":
+                        self._set_presets(result.get("presets", []))
+                        self._presets_cache_ts = now
+                        return self.available_presets
+            logger.error("获取预设列表失败: %s", response.text)
             return []
         except Exception as e:
-            logger.error(f"获取预设列表出错: {str(e)}")
+            logger.error("获取预设列表出错: %s", e)
             return []
 
+    def _set_presets(self, presets: List[str]) -> None:
+        """更新预设列表，并预先计算查找用的集合与回退预设"""
+        self.available_presets = presets
+        self._preset_set = set(presets)
+        self._first_json_preset = next((p for p in presets if p.endswith(".json")), None)
+
     def find_available_preset(self, preferred_preset: str = "wav.json") -> str:
         """查找可用的预设文件
 
@@ -137,14 +205,9 @@ class MSSTProcessor:
         def _preset_path(name: str) -> str:
             return f"presets/{name}".replace("\\", "/")
 
-        if preferred_preset in self.available_presets:
+        if preferred_preset in self._preset_set:
             return _preset_path(preferred_preset)
-
-        for preset in self.available_presets:
-            if preset.endswith(".json"):
-                return _preset_path(preset)
-
-        return _preset_path(preferred_preset)
+        return _preset_path(self._first_json_preset or preferred_preset)
 
     async def process_audio(
         self, input_file: str, preset_name: str = "wav.json"
@@ -159,24 +222,25 @@ class MSSTProcessor:
             处理结果字典，失败返回 None
         """
         max_retries = 3
-        retry_delay = 5  # 秒
+        base_retry_delay = 5  # 秒，每次重试翻倍
 
         for attempt in range(max_retries):
+            retry_delay = base_retry_delay * (2 ** attempt)
             try:
-                logger.info(f"开始处理音频文件: {input_file}")
-                logger.info(f"使用预设: {preset_name}")
+                logger.info("开始处理音频文件: %s", input_file)
+                logger.info("使用预设: %s", preset_name)
 
                 available_preset = self.find_available_preset(preset_name)
-                logger.info(f"使用预设文件: {available_preset}")
+                logger.info("使用预设文件: %s", available_preset)
 
-                with open(input_file, "rb") as f:
-                    audio_data = f.read()
-                logger.info(f"读取音频文件成功，大小: {len(audio_data)} 字节")
+                # 上传时由 aiohttp 分块读取文件，无需把整个音频读入内存
+                audio_fp = open(input_file, "rb")
+                logger.info("上传音频文件，大小: %s 字节", os.fstat(audio_fp.fileno()).st_size)
 
                 # 准备表单数据
                 data = aiohttp.FormData()
                 data.add_field("input_file",
-                             audio_data,
+                             audio_fp,
                              filename="input.wav",
                              content_type="audio/wav")
                 data.add_field("preset_path", available_preset)
@@ -188,48 +252,50 @@ class MSSTProcessor:
                 # 发送请求
                 try:
                     logger.info("发送MSST处理请求...")
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(
-                            f"{self.api_url}/infer/local",
-                            data=data,
-                            timeout=3000
-                        ) as response:
-                            if response.status == 200:
-                                result = await response.json()
-                                logger.info(f"MSST处理结果: {result}")
-                                if result.get("status") == "success":
-                                    logger.info("MSST处理成功")
-                                    return result
-                                else:
-                                    msg = result.get("message", "未知错误")
-                                    logger.error(f"MSST处理失败: {msg}")
-                                    return {"status": "error", "message": msg}
+                    session = await self.get_session()
+                    async with session.post(
+                        f"{self.api_url}/infer/local",
+                        data=data,
+                        timeout=MSST_TIMEOUT
+                    ) as response:
+                        if response.status == 200:
+                            result = await response.json(loads=_json_loads)
+                            logger.info("MSST处理结果: %s", result)
+                            if result.get("status") == "success":
+                                logger.info("MSST处理成功")
+                                return result
                             else:
-                                body = await response.text()
-                                logger.error(f"MSST处理失败: [{response.status}] {body}")
-                                return {"status": "error", "message": f"HTTP {response.status}: {body}"}
+                                msg = result.get("message", "未知错误")
+                                logger.error("MSST处理失败: %s", msg)
+                                return {"status": "error", "message": msg}
+                        else:
+                            body = await response.text()
+                            logger.error("MSST处理失败: [%s] %s", response.status, body)
+                            return {"status": "error", "message": f"HTTP {response.status}: {body}"}
 
                 except asyncio.TimeoutError:
                     logger.error("MSST处理请求超时")
                     if attempt < max_retries - 1:
-                        logger.info(f"将在 {retry_delay} 秒后重试...")
+                        logger.info("将在 %s 秒后重试...", retry_delay)
                         await asyncio.sleep(retry_delay)
                         continue
                     return None
                 except aiohttp.ClientError as e:
-                    logger.error(f"MSST处理请求失败: {str(e)}")
+                    logger.error("MSST处理请求失败: %s", e)
                     if attempt < max_retries - 1:
-                        logger.info(f"将在 {retry_delay} 秒后重试...")
+                        logger.info("将在 %s 秒后重试...", retry_delay)
                         await asyncio.sleep(retry_delay)
                         continue
                     return None
+                finally:
+                    audio_fp.close()
 
                 return None
 
             except Exception as e:
-                logger.error(f"MSST处理出错: {str(e)}")
+                logger.error("MSST处理出错: %s", e)
                 if attempt < max_retries - 1:
-                    logger.info(f"将在 {retry_delay} 秒后重试...")
+                    logger.info("将在 %s 秒后重试...", retry_delay)
                     await asyncio.sleep(retry_delay)
                     continue
                 return None
@@ -245,36 +311,50 @@ class MSSTProcessor:
             是否成功
         """
         try:
-            logger.info(f"开始下载文件: {filename} -> {output_path}")
+            logger.info("开始下载文件: %s -> %s", filename, output_path)
 
             # 确保输出目录存在
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.api_url}/download/{filename}", timeout=300) as response:
-                    if response.status == 200:
-                        with open(output_path, "wb") as f:
-                            async for chunk in response.content.iter_chunked(8192):
+            output_dir = os.path.dirname(output_path)
+            if output_dir not in self._ensured_dirs:
+                os.makedirs(output_dir, exist_ok=True)
+                self._ensured_dirs.add(output_dir)
+
+            session = await self.get_session()
+            async with session.get(f"{self.api_url}/download/{filename}", timeout=300) as response:
+                if response.status == 200:
+                    content_length = response.content_length
+                    if (
+                        content_length is not None
+                        and content_length <= self.BULK_DOWNLOAD_THRESHOLD
+                        and check_memory_safe(content_length)[0]
+                    ):
+                        # 小文件一次性读取写入，省去逐块循环
+                        data = await response.read()
+                        async with aiofiles.open(output_path, "wb") as f:
+                            await f.write(data)
+                    else:
+                        async with aiofiles.open(output_path, "wb", buffering=AUDIO_WRITE_BUFFERING) as f:
+                            async for chunk in response.content.iter_chunked(64 * 1024):
                                 if chunk:
-                                    f.write(chunk)
-
-                        # 验证文件
-                        if os.path.exists(output_path):
-                            file_size = os.path.getsize(output_path)
-                            logger.info(f"文件下载成功: {output_path}, 大小: {file_size} 字节")
-                            if file_size > 0:
-                                return True
-                            else:
-                                logger.error(f"文件大小为0: {output_path}")
-                                return False
-                        else:
-                            logger.error(f"文件不存在: {output_path}")
-                            return False
+                                    await f.write(chunk)
+
+                    # 验证文件
+                    try:
+                        file_size = (await aiofiles.os.stat(output_path)).st_size
+                    except FileNotFoundError:
+                        logger.error("文件不存在: %s", output_path)
+                        return False
+                    logger.info("文件下载成功: %s, 大小: %s 字节", output_path, file_size)
+                    if file_size > 0:
+                        return True
                     else:
-                        logger.error(f"下载文件失败: {response.status}")
+                        logger.error("文件大小为0: %s", output_path)
                         return False
+                else:
+                    logger.error("下载文件失败: %s", response.status)
+                    return False
         except Exception as e:
-            logger.error(f"下载文件出错: {str(e)}")
+            logger.error("下载文件出错: %s", e)
             return False
 
     async def get_available_models(self) -> Optional[List[str]]:
@@ -284,39 +364,79 @@ class MSSTProcessor:
             模型列表，失败返回 None
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.api_url}/models") as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("models", [])
-                    return None
+            session = await self.get_session()
+            async with session.get(f"{self.api_url}/models") as response:
+                if response.status == 200:
+                    result = await response.json(loads=_json_loads)
+                    return result.get("models", [])
+                return None
         except Exception as e:
-            logger.error(f"获取模型列表失败: {str(e)}")
+            logger.error("获取模型列表失败: %s", e)
             return None
-    async def get_latest_output_filename(self, keywords: list) -> Optional[str]:
-        """根据关键字优先级列表查找最新的输出文件名（只根据文件名关键字，不检查本地是否存在）"""
+    async def list_output_files(self) -> List[Dict]:
+        """获取 MSST 输出目录的文件列表（/list_outputs）
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.api_url}/list_outputs") as resp:
-                resp.raise_for_status()
-                data = await resp.json()
-                files = data.get("files", [])
-                if not files:
-                    print("/list_outputs 返回空文件列表")
-                    return None
-                for keyword in keywords:
-                    file_infos = []
-                    for f in files:
-                        name_match = keyword.lower() in f["name"].lower()
-                        if name_match:
-                            mtime = f.get("mtime", 0)  # 如果有mtime字段，否则为0
-                            file_infos.append((f["name"], mtime))
-                    if file_infos:
-                        file_infos.sort(key=lambda x: x[1], reverse=True)
-                        print(f"DEBUG: 命中关键字 '{keyword}' 的文件: {[x[0] for x in file_infos]}")
-                        return file_infos[0][0]
-                print(f"没有找到包含关键字 {keywords} 的音频文件。")
-                return None
+        Returns:
+            文件信息字典列表，每项至少包含 name，可能包含 mtime
+        """
+        session = await self.get_session()
+        async with session.get(f"{self.api_url}/list_outputs") as resp:
+            resp.raise_for_status()
+            data = await resp.json(loads=_json_loads)
+        return data.get("files", [])
+
+    @staticmethod
+    def output_files_from_result(result: Dict) -> List[Dict]:
+        """从 /infer/local 的返回结果中取出本次生成的文件列表
+
+        服务端若在结果中直接给出输出文件（files / outputs / output_files），
+        就不必再请求一次 /list_outputs
+
+        Args:
+            result: process_audio 返回的结果字典
+
+        Returns:
+            与 list_output_files 格式一致的文件信息列表，结果中没有时返回空列表
+        """
+        for key in ("files", "outputs", "output_files"):
+            items = result.get(key)
+            if isinstance(items, list) and items:
+                files = []
+                for item in items:
+                    if isinstance(item, str):
+                        files.append({"name": os.path.basename(item)})
+                    elif isinstance(item, dict) and item.get("name"):
+                        files.append(item)
+                if files:
+                    return files
+        return []
+
+    @staticmethod
+    def find_latest_output_filename(files: List[Dict], keywords: List[str]) -> Optional[str]:
+        """根据关键字优先级列表，在已获取的文件列表中查找最新的输出文件名
+
+        Args:
+            files: list_output_files 返回的文件列表
+            keywords: 按优先级排列的文件名关键字
+
+        Returns:
+            命中的文件名，未找到返回 None
+        """
+        if not files:
+            logger.warning("/list_outputs 返回空文件列表")
+            return None
+        for keyword in keywords:
+            keyword = keyword.lower()
+            matches = [f for f in files if keyword in f["name"].lower()]
+            if matches:
+                # 如果有mtime字段按其取最新，否则为0
+                return max(matches, key=lambda f: f.get("mtime", 0))["name"]
+        logger.warning("没有找到包含关键字 %s 的音频文件", keywords)
+        return None
+
+    async def get_latest_output_filename(self, keywords: List[str]) -> Optional[str]:
+        """根据关键字优先级列表查找最新的输出文件名（只根据文件名关键字，不检查本地是否存在）"""
+        return self.find_latest_output_filename(await self.list_output_files(), keywords)
 
 class VoiceConverter:
     """语音转换器"""
@@ -325,6 +445,24 @@ class VoiceConverter:
     DDSP_REFLOW_INFER_PATH = "/v1/infer"
     DDSP_REFLOW_SPEAKERS_PATH = "/v1/models/speakers"
 
+    # 健康检查遇到网关类错误时的重试次数与退避基数（秒）
+    HEALTH_RETRY_STATUSES = frozenset({502, 503, 504})
+    HEALTH_MAX_RETRIES = 2
+    HEALTH_RETRY_BACKOFF = 0.3
+
+    # 模型/说话人列表缓存时间（秒）
+    MODELS_CACHE_TTL = 30.0
+
+    # 健康状态缓存时间（秒），连续转换请求之间不必每次都请求 /health
+    HEALTH_CACHE_TTL = 5.0
+
+    # 服务端队列已满时的重新检查次数与间隔（秒）
+    QUEUE_FULL_RETRIES = 5
+    QUEUE_FULL_POLL_INTERVAL = 2.0
+
+    # 母带压缩器阈值（dB），限制器阈值更高；峰值低于压缩器阈值时整条母带链都不会起作用
+    MASTER_COMP_THRESHOLD_DB = -10
+
     def __init__(self, config: Optional[Dict] = None):
         """初始化语音转换器
 
@@ -340,9 +478,10 @@ class VoiceConverter:
         self.task_lock = asyncio.Lock()  # 任务锁
 
         # 初始化临时目录
+        self._ensured_dirs: set[str] = set()  # 已确认存在的输出目录
         self.temp_dir = os.path.join("data", "temp", "so-vits-svc")
-        os.makedirs(self.temp_dir, exist_ok=True)
-        logger.info(f"临时目录: {self.temp_dir}")
+        self._ensure_dir(self.temp_dir)
+        logger.info("临时目录: %s", self.temp_dir)
 
         # API 设置
         self.api_url = self.base_setting.get("base_url", "http://localhost:1145")
@@ -373,9 +512,34 @@ class VoiceConverter:
         self.default_f0_predictor = self.voice_config.get("default_f0_predictor", "fcpe")
         self.default_enhancer_adaptive_key = self.voice_config.get("default_enhancer_adaptive_key", 0)
         self.default_cr_threshold = self.voice_config.get("default_cr_threshold", 0.05)
+        # 推理默认参数只构建一次，供缓存键与 convert_voice_async 直接展开使用
+        self.default_infer_params: Dict[str, Any] = {
+            "k_step": self.default_k_step,
+            "shallow_diffusion": self.default_shallow_diffusion,
+            "only_diffusion": self.default_only_diffusion,
+            "cluster_infer_ratio": self.default_cluster_infer_ratio,
+            "auto_predict_f0": self.default_auto_predict_f0,
+            "noice_scale": self.default_noice_scale,
+            "f0_filter": self.default_f0_filter,
+            "f0_predictor": self.default_f0_predictor,
+            "enhancer_adaptive_key": self.default_enhancer_adaptive_key,
+            "cr_threshold": self.default_cr_threshold,
+        }
         self.ddsp_spk_id = str(self.voice_config.get("ddsp_spk_id", "1"))
         self.enable_mixing = self.voice_config.get("enable_mixing", True)
 
+        # 每次请求都不变的表单字段，预先构建后直接复用
+        self._static_fields: List[Tuple[str, str]] = [("wav_format", "wav")]
+        self._reflow_static_fields: List[Tuple[str, str]] = [
+            ("spk_id", self.ddsp_spk_id),
+            ("spk_mix_dict", "None"),
+            ("f0_min", "50"),
+            ("f0_max", "1100"),
+            ("threhold", "-60"),
+            ("method", "auto"),
+            ("t_start", "0.0"),
+        ]
+
         # 混音设置
         self.sample_rate = self.mixing_config.get("sample_rate", 44100)
         self.headroom = self.mixing_config.get("headroom", -8)
@@ -384,6 +548,11 @@ class VoiceConverter:
 
         # 初始化组件
         self.msst_processor = MSSTProcessor(self.msst_url)
+        self.http_session: Optional[aiohttp.ClientSession] = None  # 延迟创建，与 MSST 处理器共用
+        self._models_cache: Optional[List[str]] = None
+        self._models_cache_ts = 0.0
+        self._health_cache: Optional[Dict] = None
+        self._health_cache_ts = 0.0
         self.netease_api = NeteaseMusicAPI(self.config)
         self.qqmusic_api = QQMusicAPI(self.config)
 
@@ -395,39 +564,81 @@ class VoiceConverter:
             max_cache_age=cache_config.get("max_cache_age", 7*24*60*60)  # 默认7天
         )
 
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取插件生命周期内复用的 HTTP 会话
+
+        Returns:
+            共用的 aiohttp 会话，未创建或已关闭时重新创建
+        """
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = await self.msst_processor.get_session()
+        return self.http_session
+
+    async def close(self):
+        """关闭共用的 HTTP 会话"""
+        await self.msst_processor.close()
+        await self.netease_api.close()
+        await self.qqmusic_api.close()
+        self.http_session = None
+
     async def get_available_models(self) -> Optional[List[str]]:
+        """获取可用模型/说话人列表，成功结果缓存 MODELS_CACHE_TTL 秒
+
+        Returns:
+            模型列表，失败返回 None
+        """
+        now = time.monotonic()
+        if self._models_cache is not None and now - self._models_cache_ts < self.MODELS_CACHE_TTL:
+            return self._models_cache
+        models = await self._fetch_available_models()
+        if models is not None:
+            self._models_cache = models
+            self._models_cache_ts = now
+        return models
+
+    def invalidate_models_cache(self) -> None:
+        """使模型列表缓存失效（切换默认说话人或模型目录后调用）"""
+        self._models_cache_ts = 0.0
+
+    async def _fetch_available_models(self) -> Optional[List[str]]:
         """So-Vits：/models；DDSP Reflow：GET /v1/models/speakers 中的 speaker 名"""
         if self.svc_backend == "ddsp_reflow":
             url = f"{self.api_url.rstrip('/')}{VoiceConverter.DDSP_REFLOW_SPEAKERS_PATH}"
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            items = data.get("speakers") or []
-                            names: List[str] = []
-                            for it in items:
-                                if isinstance(it, dict) and it.get("speaker") is not None:
-                                    names.append(str(it["speaker"]))
-                            if names:
-                                return sorted(names)
+                session = await self.get_session()
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        data = await response.json(loads=_json_loads)
+                        items = data.get("speakers") or []
+                        names: List[str] = []
+                        for it in items:
+                            if isinstance(it, dict) and it.get("speaker") is not None:
+                                names.append(str(it["speaker"]))
+                        if names:
+                            return sorted(names)
             except Exception as e:
-                logger.error(f"获取 DDSP Reflow 说话人列表失败: {e}")
+                logger.error("获取 DDSP Reflow 说话人列表失败: %s", e)
             allowed = self.voice_config.get("ddsp_allowed_speakers") or []
             if isinstance(allowed, list) and allowed:
                 return [str(x) for x in allowed]
             return [str(i) for i in range(10)]
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.api_url}/models") as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("models", [])
-                    return None
+            session = await self.get_session()
+            async with session.get(f"{self.api_url}/models") as response:
+                if response.status == 200:
+                    result = await response.json(loads=_json_loads)
+                    return result.get("models", [])
+                return None
         except Exception as e:
-            logger.error(f"获取模型列表失败: {str(e)}")
+            logger.error("获取模型列表失败: %s", e)
             return None
 
+    def _ensure_dir(self, path: str) -> None:
+        """确保目录存在，同一目录只创建一次"""
+        if path not in self._ensured_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._ensured_dirs.add(path)
+
     def _reflow_infer_url(self) -> str:
         return f"{self.api_url.rstrip('/')}{VoiceConverter.DDSP_REFLOW_INFER_PATH}"
 
@@ -477,13 +688,15 @@ class VoiceConverter:
             音频数据
         """
         try:
+            pb = _get_pedalboard()
+
             # 检查文件大小和内存
             file_size = os.path.getsize(path)
             is_safe, memory_warning = check_memory_safe(file_size)
             if not is_safe:
                 raise MemoryError(memory_warning)
 
-            with AudioFile(path).resampled_to(self.sample_rate) as audio:
+            with pb.io.AudioFile(path).resampled_to(self.sample_rate) as audio:
                 data = audio.read(audio.frames)
 
                 # 检查加载后的数据大小
@@ -494,106 +707,80 @@ class VoiceConverter:
 
                 return data
         except Exception as e:
-            logger.error(f"加载音频文件失败: {str(e)}\n{traceback.format_exc()}")
+            logger.error("加载音频文件失败: %s", e, exc_info=True)
             raise
 
     def _process_vocal(self, audio: np.ndarray, release: int = 300, fb: int = 180) -> np.ndarray:
         """处理人声"""
         try:
-            # 检查处理前的数据大小
-            data_size = audio.nbytes
-            is_safe, memory_warning = check_memory_safe(data_size)
-            if not is_safe:
-                raise MemoryError(memory_warning)
-
-            vocal_board = Pedalboard([
-                Gain(self.voc_input),
-                HighpassFilter(230),
-                PeakFilter(2700, -2, 1),
-                HighShelfFilter(20000, -2, 1.8),
-                Gain(1),
-                PeakFilter(1400, 3, 1.15),
-                PeakFilter(8500, 2.5, 1),
-                Gain(-1),
-                Mix([
-                    Gain(0),
-                    Pedalboard([
-                        Invert(),
-                        Compressor(-30, 3.2, 40, fb),
-                        Gain(-40)
+            pb = _get_pedalboard()
+            vocal_board = pb.Pedalboard([
+                pb.Gain(self.voc_input),
+                pb.HighpassFilter(230),
+                pb.PeakFilter(2700, -2, 1),
+                pb.HighShelfFilter(20000, -2, 1.8),
+                pb.Gain(1),
+                pb.PeakFilter(1400, 3, 1.15),
+                pb.PeakFilter(8500, 2.5, 1),
+                pb.Gain(-1),
+                pb.Mix([
+                    pb.Gain(0),
+                    pb.Pedalboard([
+                        pb.Invert(),
+                        pb.Compressor(-30, 3.2, 40, fb),
+                        pb.Gain(-40)
                     ])
                 ]),
-                Compressor(-18, 2.5, 19, release),
-                Gain(0)
+                pb.Compressor(-18, 2.5, 19, release),
+                pb.Gain(0)
             ])
 
-            processed = vocal_board(audio, self.sample_rate)
-
-            # 检查处理后的数据大小
-            processed_size = processed.nbytes
-            is_safe, memory_warning = check_memory_safe(processed_size)
-            if not is_safe:
-                raise MemoryError(memory_warning)
-
-            return processed
+            return vocal_board(audio, self.sample_rate)
         except Exception as e:
-            logger.error(f"处理人声失败: {str(e)}\n{traceback.format_exc()}")
+            logger.error("处理人声失败: %s", e, exc_info=True)
             raise
 
     def _process_reverb(self, audio: np.ndarray, s: int = 5, m: int = 25, long_time: int = 50, d: int = 200) -> np.ndarray:
         """添加混响效果"""
         try:
-            # 检查处理前的数据大小
-            data_size = audio.nbytes
-            is_safe, memory_warning = check_memory_safe(data_size)
-            if not is_safe:
-                raise MemoryError(memory_warning)
-
-            delay = Pedalboard([
-                Gain(-20),
-                Delay(d/8, 0, 1),
-                Gain(-12),
+            pb = _get_pedalboard()
+            delay = pb.Pedalboard([
+                pb.Gain(-20),
+                pb.Delay(d/8, 0, 1),
+                pb.Gain(-12),
             ])
 
-            short = Pedalboard([
-                Gain(-20),
-                Delay(s/1000, 0, 1),
-                Reverb(0.2, 0.35, 1, 0, 1, 0),
-                Gain(-12),
+            short = pb.Pedalboard([
+                pb.Gain(-20),
+                pb.Delay(s/1000, 0, 1),
+                pb.Reverb(0.2, 0.35, 1, 0, 1, 0),
+                pb.Gain(-12),
             ])
 
-            medium = Pedalboard([
-                Gain(-16),
-                Delay(m/1000, 0.3, 1),
-                Reverb(0.45, 0.55, 1, 0, 1, 0),
-                Gain(-19),
+            medium = pb.Pedalboard([
+                pb.Gain(-16),
+                pb.Delay(m/1000, 0.3, 1),
+                pb.Reverb(0.45, 0.55, 1, 0, 1, 0),
+                pb.Gain(-19),
             ])
 
-            long = Pedalboard([
-                Gain(-12),
-                Delay(long_time/1000, 0.6, 1),
-                Reverb(0.6, 0.7, 1, 0, 1, 0),
-                Gain(-23)
+            long = pb.Pedalboard([
+                pb.Gain(-12),
+                pb.Delay(long_time/1000, 0.6, 1),
+                pb.Reverb(0.6, 0.7, 1, 0, 1, 0),
+                pb.Gain(-23)
             ])
 
-            reverb_board = Pedalboard([
-                Mix([short, medium, long, delay]),
-                PeakFilter(1450, -4, 1.83),
-                PeakFilter(2300, 5, 0.51),
-                Gain(self.revb_gain),
+            reverb_board = pb.Pedalboard([
+                pb.Mix([short, medium, long, delay]),
+                pb.PeakFilter(1450, -4, 1.83),
+                pb.PeakFilter(2300, 5, 0.51),
+                pb.Gain(self.revb_gain),
             ])
 
-            processed = reverb_board(audio, self.sample_rate)
-
-            # 检查处理后的数据大小
-            processed_size = processed.nbytes
-            is_safe, memory_warning = check_memory_safe(processed_size)
-            if not is_safe:
-                raise MemoryError(memory_warning)
-
-            return processed
+            return reverb_board(audio, self.sample_rate)
         except Exception as e:
-            logger.error(f"添加混响效果失败: {str(e)}\n{traceback.format_exc()}")
+            logger.error("添加混响效果失败: %s", e, exc_info=True)
             raise
 
     def _process_instrument(self, audio: np.ndarray) -> np.ndarray:
@@ -605,7 +792,8 @@ class VoiceConverter:
         Returns:
             处理后的音频数据
         """
-        inst_board = Pedalboard([Gain(self.headroom)])
+        pb = _get_pedalboard()
+        inst_board = pb.Pedalboard([pb.Gain(self.headroom)])
         return inst_board(audio, self.sample_rate)
 
     def _process_master(self, audio: np.ndarray, comp_rel: int = 500, lim_rel: int = 400) -> np.ndarray:
@@ -619,16 +807,19 @@ class VoiceConverter:
         Returns:
             处理后的音频数据
         """
-        master_board = Pedalboard([
-            Compressor(-10, 1.6, 10, comp_rel),
-            Limiter(-3, lim_rel),
-            Gain(-0.5)
+        pb = _get_pedalboard()
+        master_board = pb.Pedalboard([
+            pb.Compressor(self.MASTER_COMP_THRESHOLD_DB, 1.6, 10, comp_rel),
+            pb.Limiter(-3, lim_rel),
+            pb.Gain(-0.5)
         ])
         return master_board(audio, self.sample_rate)
 
     def mix_audio(self, vocal_path: str, inst_path: str, output_path: str) -> bool:
         """混合人声和伴奏"""
         try:
+            pb = _get_pedalboard()
+
             # 检查输入文件大小
             vocal_size = os.path.getsize(vocal_path)
             inst_size = os.path.getsize(inst_path)
@@ -637,13 +828,13 @@ class VoiceConverter:
             total_input_size = vocal_size + inst_size
             is_safe, memory_warning = check_memory_safe(total_input_size)
             if not is_safe:
-                logger.error(f"混音内存不足: {memory_warning}")
+                logger.error("混音内存不足: %s", memory_warning)
                 return False
 
             # 加载音频
-            logger.info(f"加载人声音频: {vocal_path}")
+            logger.info("加载人声音频: %s", vocal_path)
             vocal = self._load_audio(vocal_path)
-            logger.info(f"加载伴奏音频: {inst_path}")
+            logger.info("加载伴奏音频: %s", inst_path)
             inst = self._load_audio(inst_path)
 
             # 处理人声
@@ -668,23 +859,21 @@ class VoiceConverter:
             combined_size = combined.nbytes
             is_safe, memory_warning = check_memory_safe(combined_size)
             if not is_safe:
-                logger.error(f"混合音频内存不足: {memory_warning}")
+                logger.error("混合音频内存不足: %s", memory_warning)
                 return False
 
-            # 母带处理
-            logger.info("母带处理...")
-            final = self._process_master(combined)
-
-            # 检查最终数据大小
-            final_size = final.nbytes
-            is_safe, memory_warning = check_memory_safe(final_size)
-            if not is_safe:
-                logger.error(f"母带处理内存不足: {memory_warning}")
-                return False
+            # 母带处理：峰值低于压缩器阈值时压缩/限制都不会起作用，只做输出增益
+            peak_db = 20 * np.log10(max(float(np.max(np.abs(combined))), 1e-12))
+            if peak_db < self.MASTER_COMP_THRESHOLD_DB:
+                logger.info("峰值 %.1fdB 已留足余量，跳过母带压缩/限制", peak_db)
+                final = pb.Pedalboard([pb.Gain(-0.5)])(combined, self.sample_rate)
+            else:
+                logger.info("母带处理（峰值 %.1fdB）...", peak_db)
+                final = self._process_master(combined)
 
             # 输出
-            logger.info(f"保存混合后的音频: {output_path}")
-            with AudioFile(
+            logger.info("保存混合后的音频: %s", output_path)
+            with pb.io.AudioFile(
                 output_path,
                 "w",
                 self.sample_rate,
@@ -695,51 +884,79 @@ class VoiceConverter:
 
             # 清理内存
             del vocal, inst, processed_vocal, stereo_vocal, reverb_vocal, processed_inst, combined, final
-            import gc
-            gc.collect()
 
             logger.info("混音处理完成")
             return True
 
         except Exception as e:
-            logger.error(f"混音处理失败: {str(e)}\n{traceback.format_exc()}")
+            logger.error("混音处理失败: %s", e, exc_info=True)
             return False
 
-    async def check_health(self) -> Optional[Dict]:
-        """检查服务健康状态
+    async def check_health(self, use_cache: bool = True) -> Optional[Dict]:
+        """检查服务健康状态，成功结果缓存 HEALTH_CACHE_TTL 秒，失败时清除缓存
+
+        Args:
+            use_cache: 是否允许使用缓存的健康状态
 
         Returns:
             健康状态信息字典，失败返回 None
         """
+        now = time.monotonic()
+        if (
+            use_cache
+            and self._health_cache is not None
+            and now - self._health_cache_ts < self.HEALTH_CACHE_TTL
+        ):
+            return self._health_cache
+        health = await self._fetch_health()
+        self._health_cache = health
+        self._health_cache_ts = now
+        return health
+
+    def _queue_full(self, health: Dict) -> bool:
+        """根据健康状态判断服务端推理队列是否已满"""
+        if self.svc_backend == "ddsp_reflow":
+            queue_max = health.get("queue_max", 0)
+            return bool(health.get("queue_limited")) and queue_max > 0 and health.get("queue_size", 0) >= queue_max
+        return health.get("queue_size", 0) >= self.max_queue_size
+
+    async def _fetch_health(self) -> Optional[Dict]:
+        """请求 /health，网关类错误时退避重试"""
         try:
-            async with aiohttp.ClientSession() as session:
+            session = await self.get_session()
+            for attempt in range(self.HEALTH_MAX_RETRIES + 1):
                 async with session.get(f"{self.api_url}/health") as response:
-                    if response.status != 200:
-                        return None
-                    result = await response.json()
-                    if self.svc_backend == "ddsp_reflow":
-                        pending = int(result.get("queue_pending", 0) or 0)
-                        qmax = int(result.get("queue_max", 0) or 0)
-                        md = result.get("models_dir")
-                        return {
-                            "status": result.get("status"),
-                            "model_loaded": bool(result.get("model_loaded")),
-                            "models_dir": md,
-                            "queue_size": pending,
-                            "queue_pending": pending,
-                            "queue_max": qmax,
-                            "queue_limited": bool(result.get("queue_limited")),
-                            "active_tasks": 0,
-                            "cached_models": 0,
-                        }
-                    return {
-                        "status": result.get("status"),
-                        "queue_size": result.get("queue_size", 0),
-                        "active_tasks": result.get("active_tasks", 0),
-                        "cached_models": result.get("cached_models", 0),
-                    }
+                    status = response.status
+                    if status == 200:
+                        result = await response.json(loads=_json_loads)
+                        break
+                if status not in self.HEALTH_RETRY_STATUSES or attempt == self.HEALTH_MAX_RETRIES:
+                    return None
+                # 网关类错误多为服务重启等瞬时故障，退避后复用同一连接池重试
+                await asyncio.sleep(self.HEALTH_RETRY_BACKOFF * 2 ** attempt)
+            if self.svc_backend == "ddsp_reflow":
+                pending = int(result.get("queue_pending", 0) or 0)
+                qmax = int(result.get("queue_max", 0) or 0)
+                md = result.get("models_dir")
+                return {
+                    "status": result.get("status"),
+                    "model_loaded": bool(result.get("model_loaded")),
+                    "models_dir": md,
+                    "queue_size": pending,
+                    "queue_pending": pending,
+                    "queue_max": qmax,
+                    "queue_limited": bool(result.get("queue_limited")),
+                    "active_tasks": 0,
+                    "cached_models": 0,
+                }
+            return {
+                "status": result.get("status"),
+                "queue_size": result.get("queue_size", 0),
+                "active_tasks": result.get("active_tasks", 0),
+                "cached_models": result.get("cached_models", 0),
+            }
         except Exception as e:
-            logger.error(f"健康检查失败: {str(e)}")
+            logger.error("健康检查失败: %s", e)
             return None
 
     async def convert_voice_async(
@@ -768,7 +985,7 @@ class VoiceConverter:
 
             try:
                 self.current_task = asyncio.current_task()
-                logger.info(f"开始异步语音转换任务，输入文件: {input_wav}")
+                logger.info("开始异步语音转换任务，输入文件: %s", input_wav)
 
                 success = await self.convert_voice(
                     input_wav,
@@ -794,7 +1011,7 @@ class VoiceConverter:
 
                 # 验证输出文件
                 if not os.path.exists(output_wav):
-                    logger.error(f"转换后的输出文件不存在: {output_wav}")
+                    logger.error("转换后的输出文件不存在: %s", output_wav)
                     return False
 
                 output_size = os.path.getsize(output_wav)
@@ -802,11 +1019,11 @@ class VoiceConverter:
                     logger.error("转换后的输出文件大小为0")
                     return False
 
-                logger.info(f"异步语音转换任务完成，输出文件: {output_wav}, 大小: {output_size} 字节")
+                logger.info("异步语音转换任务完成，输出文件: %s, 大小: %d 字节", output_wav, output_size)
                 return True
 
             except Exception as e:
-                logger.error(f"异步语音转换任务出错: {str(e)}")
+                logger.error("异步语音转换任务出错: %s", e)
                 return False
             finally:
                 self.current_task = None
@@ -831,22 +1048,22 @@ class VoiceConverter:
     ) -> bool:
         """转换语音"""
         try:
-            logger.info(f"开始语音转换流程，输入文件: {input_wav}, 输出文件: {output_wav}")
+            logger.info("开始语音转换流程，输入文件: %s, 输出文件: %s", input_wav, output_wav)
 
             # 检查输入文件大小
             input_size = os.path.getsize(input_wav)
             is_safe, memory_warning = check_memory_safe(input_size)
             if not is_safe:
-                logger.error(f"转换语音内存不足: {memory_warning}")
+                logger.error("转换语音内存不足: %s", memory_warning)
                 return False
 
             # 确保临时目录存在
             output_dir = os.path.dirname(output_wav)
             try:
-                os.makedirs(output_dir, exist_ok=True)
-                logger.info(f"确保输出目录存在: {output_dir}")
+                self._ensure_dir(output_dir)
+                logger.info("确保输出目录存在: %s", output_dir)
             except Exception as e:
-                logger.error(f"创建输出目录失败: {str(e)}")
+                logger.error("创建输出目录失败: %s", e)
                 return False
 
             # 使用默认值
@@ -866,9 +1083,9 @@ class VoiceConverter:
 
             # 检查输入文件
             if not os.path.exists(input_wav):
-                logger.error(f"输入文件不存在: {input_wav}")
+                logger.error("输入文件不存在: %s", input_wav)
                 return False
-            logger.info(f"输入文件存在，大小: {os.path.getsize(input_wav)} 字节")
+            logger.info("输入文件存在，大小: %s 字节", os.path.getsize(input_wav))
 
             # 检查服务健康状态
             logger.info("检查服务健康状态...")
@@ -877,33 +1094,35 @@ class VoiceConverter:
                 logger.error("服务未就绪")
                 return False
 
-            if self.svc_backend == "ddsp_reflow":
-                if health.get("queue_limited") and health.get("queue_max", 0) > 0:
-                    if health.get("queue_size", 0) >= health.get("queue_max", 0):
+            # 服务端队列已满时不立即失败，间隔轮询等待队列空出
+            for attempt in range(self.QUEUE_FULL_RETRIES + 1):
+                if not self._queue_full(health):
+                    break
+                if attempt == self.QUEUE_FULL_RETRIES:
+                    if self.svc_backend == "ddsp_reflow":
                         logger.error("DDSP Reflow 推理队列已满")
-                        return False
-            elif health.get("queue_size", 0) >= self.max_queue_size:
-                logger.error("服务器任务队列已满")
-                return False
+                    else:
+                        logger.error("服务器任务队列已满")
+                    return False
+                logger.info(
+                    "服务端队列已满，%.0f 秒后重新检查（%d/%d）",
+                    self.QUEUE_FULL_POLL_INTERVAL, attempt + 1, self.QUEUE_FULL_RETRIES,
+                )
+                await asyncio.sleep(self.QUEUE_FULL_POLL_INTERVAL)
+                health = await self.check_health(use_cache=False)
+                if not health:
+                    logger.error("服务未就绪")
+                    return False
             logger.info("服务健康状态检查通过")
 
             # 说话人 ID 以配置/命令为准，直接传给服务端，不与服务端列表比对
             setattr(self, "_last_convert_error_message", None)
 
-            # 读取音频文件
+            # 上传时由 aiohttp 分块读取文件，无需把整个音频读入内存
             try:
-                with open(input_wav, "rb") as f:
-                    audio_data = f.read()
-                logger.info(f"成功读取音频文件，大小: {len(audio_data)} 字节")
-
-                # 检查读取后的数据大小
-                is_safe, memory_warning = check_memory_safe(len(audio_data))
-                if not is_safe:
-                    logger.error(f"读取音频文件内存不足: {memory_warning}")
-                    return False
-
-            except Exception as e:
-                logger.error(f"读取音频文件失败: {str(e)}\n{traceback.format_exc()}")
+                audio_fp = open(input_wav, "rb")
+            except OSError as e:
+                logger.error("打开音频文件失败: %s", e)
                 return False
 
             in_name = os.path.basename(input_wav) or "input.wav"
@@ -912,164 +1131,167 @@ class VoiceConverter:
             if in_ext.lower() == ".flac":
                 audio_ct = "audio/flac"
 
-            timeout = aiohttp.ClientTimeout(total=float(self.timeout))
+            # 配置的 timeout 作为单次读取超时，长音频推理不会因总时长被中断
+            timeout = aiohttp.ClientTimeout(
+                total=None, connect=30, sock_connect=30, sock_read=float(self.timeout)
+            )
             start_time = time.time()
 
             async def _save_wav_response(response: aiohttp.ClientResponse) -> bool:
-                os.makedirs(os.path.dirname(output_wav), exist_ok=True)
-                audio_content = await response.read()
-                logger.info(f"收到音频数据，大小: {len(audio_content)} 字节")
-                if len(audio_content) == 0:
+                # 边接收边写盘，内存占用只有一个分块
+                received = 0
+                async with aiofiles.open(output_wav, "wb", buffering=AUDIO_WRITE_BUFFERING) as f:
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        received += len(chunk)
+                        await f.write(chunk)
+                logger.info("收到音频数据，大小: %s 字节", received)
+                if received == 0:
                     logger.error("收到的音频数据为空")
                     return False
-                with open(output_wav, "wb") as f:
-                    f.write(audio_content)
-                if not os.path.exists(output_wav) or os.path.getsize(output_wav) == 0:
-                    logger.error("输出文件无效")
-                    return False
                 logger.info(
-                    f"转换成功！输出: {output_wav}，耗时: {time.time() - start_time:.2f}s"
+                    "转换成功！输出: %s，耗时: %.2fs", output_wav, time.time() - start_time
                 )
                 return True
 
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    if self.svc_backend == "ddsp_reflow":
-                        ckpt, spk_folder = self._reflow_resolve_ckpt_and_speaker(
-                            model_dir, str(speaker_id)
-                        )
-                        data_rf = aiohttp.FormData()
-                        data_rf.add_field(
-                            "audio",
-                            audio_data,
-                            filename=in_name,
-                            content_type=audio_ct,
-                        )
-                        if ckpt:
-                            data_rf.add_field("model_ckpt", ckpt)
-                        elif spk_folder:
-                            data_rf.add_field("speaker", spk_folder)
-                        data_rf.add_field("spk_id", self.ddsp_spk_id)
-                        data_rf.add_field("spk_mix_dict", "None")
-                        data_rf.add_field("key", str(pitch_adjust))
-                        data_rf.add_field(
-                            "formant_shift_key", str(enhancer_adaptive_key)
-                        )
-                        pe = self._pitch_extractor_for_reflow(f0_predictor)
-                        data_rf.add_field("pitch_extractor", pe)
-                        data_rf.add_field("f0_min", "50")
-                        data_rf.add_field("f0_max", "1100")
-                        data_rf.add_field("threhold", "-60")
-                        data_rf.add_field("infer_step", str(k_step))
-                        data_rf.add_field("method", "auto")
-                        data_rf.add_field("t_start", "0.0")
-                        infer_url = self._reflow_infer_url()
-                        log_sel = f"model_ckpt={ckpt}" if ckpt else f"speaker={spk_folder!r}"
-                        logger.info(
-                            f"DDSP Reflow 推理: {infer_url} {log_sel} spk_id={self.ddsp_spk_id} key={pitch_adjust}"
-                        )
-                        async with session.post(infer_url, data=data_rf) as response:
-                            logger.info(f"收到响应，状态码: {response.status}")
-                            if response.status == 200:
-                                return await _save_wav_response(response)
-                            error_msg = await response.text()
-                            logger.error(
-                                f"DDSP Reflow 转换失败 [{response.status}]: {error_msg}"
-                            )
-                            msg = error_msg
-                            try:
-                                import json
-
-                                detail = json.loads(error_msg)
-                                if isinstance(detail, dict):
-                                    msg = str(
-                                        detail.get("detail", detail.get("message", msg))
-                                    )
-                            except Exception:
-                                pass
-                            setattr(
-                                self,
-                                "_last_convert_error_message",
-                                f"人声转换失败：{msg}",
-                            )
-                            return False
-
-                    data = aiohttp.FormData()
-                    data.add_field(
+                session = await self.get_session()
+                if self.svc_backend == "ddsp_reflow":
+                    ckpt, spk_folder = self._reflow_resolve_ckpt_and_speaker(
+                        model_dir, str(speaker_id)
+                    )
+                    data_rf = aiohttp.FormData()
+                    data_rf.add_field(
                         "audio",
-                        audio_data,
-                        filename="input.wav",
-                        content_type="audio/wav",
+                        audio_fp,
+                        filename=in_name,
+                        content_type=audio_ct,
                     )
-                    data.add_field("model_dir", model_dir)
-                    data.add_field("tran", str(pitch_adjust))
-                    data.add_field("spk", str(speaker_id))
-                    data.add_field("wav_format", "wav")
-                    data.add_field("k_step", str(k_step))
-                    data.add_field("shallow_diffusion", str(shallow_diffusion).lower())
-                    data.add_field("only_diffusion", str(only_diffusion).lower())
-                    data.add_field("cluster_infer_ratio", str(cluster_infer_ratio))
-                    data.add_field("auto_predict_f0", str(auto_predict_f0).lower())
-                    data.add_field("noice_scale", str(noice_scale))
-                    data.add_field("f0_filter", str(f0_filter).lower())
-                    data.add_field("f0_predictor", f0_predictor)
-                    data.add_field(
-                        "enhancer_adaptive_key", str(enhancer_adaptive_key)
+                    if ckpt:
+                        data_rf.add_field("model_ckpt", ckpt)
+                    elif spk_folder:
+                        data_rf.add_field("speaker", spk_folder)
+                    for name, value in self._reflow_static_fields:
+                        data_rf.add_field(name, value)
+                    data_rf.add_field("key", str(pitch_adjust))
+                    data_rf.add_field(
+                        "formant_shift_key", str(enhancer_adaptive_key)
+                    )
+                    pe = self._pitch_extractor_for_reflow(f0_predictor)
+                    data_rf.add_field("pitch_extractor", pe)
+                    data_rf.add_field("infer_step", str(k_step))
+                    infer_url = self._reflow_infer_url()
+                    log_sel = f"model_ckpt={ckpt}" if ckpt else f"speaker={spk_folder!r}"
+                    logger.info(
+                        "DDSP Reflow 推理: %s %s spk_id=%s key=%s",
+                        infer_url, log_sel, self.ddsp_spk_id, pitch_adjust,
                     )
-                    data.add_field("cr_threshold", str(cr_threshold))
-
-                    logger.info(f"开始转换音频: {input_wav} -> {output_wav}")
-                    logger.info(f"So-VITS API: {self.api_url}/wav2wav 超时 {self.timeout}s")
                     async with session.post(
-                        f"{self.api_url}/wav2wav", data=data
+                        infer_url, data=data_rf, timeout=timeout
                     ) as response:
-                        logger.info(f"收到响应，状态码: {response.status}")
+                        logger.info("收到响应，状态码: %s", response.status)
                         if response.status == 200:
-                            try:
-                                os.makedirs(os.path.dirname(output_wav), exist_ok=True)
-                                return await _save_wav_response(response)
-                            except Exception as e:
-                                logger.error(f"保存输出文件时出错: {str(e)}")
-                                return False
+                            return await _save_wav_response(response)
                         error_msg = await response.text()
-                        logger.error(f"转换失败！状态码: {response.status}")
-                        logger.error(f"错误信息: {error_msg}")
-                        if (
-                            "not in the speaker list" in error_msg
-                            or "speaker" in error_msg.lower()
-                        ):
-                            try:
-                                import json
-
-                                detail = json.loads(error_msg)
-                                msg = detail.get(
-                                    "detail", detail.get("message", error_msg)
+                        logger.error(
+                            "DDSP Reflow 转换失败 [%s]: %s", response.status, error_msg
+                        )
+                        msg = error_msg
+                        try:
+                            detail = _json_loads(error_msg)
+                            if isinstance(detail, dict):
+                                msg = str(
+                                    detail.get("detail", detail.get("message", msg))
                                 )
-                            except Exception:
-                                msg = error_msg
-                            models = await self.get_available_models()
-                            hint = (
-                                f"当前可用说话人：{', '.join(models)}。"
-                                if models
-                                else ""
-                            )
-                            setattr(
-                                self,
-                                "_last_convert_error_message",
-                                f"人声转换失败：{msg}。{hint}请使用 /svc_speakers [说话人ID] 设置有效说话人，例如：/svc_speakers 0",
-                            )
+                        except Exception:
+                            pass
+                        setattr(
+                            self,
+                            "_last_convert_error_message",
+                            f"人声转换失败：{msg}",
+                        )
                         return False
+
+                data = aiohttp.FormData()
+                data.add_field(
+                    "audio",
+                    audio_fp,
+                    filename="input.wav",
+                    content_type="audio/wav",
+                )
+                data.add_field("model_dir", model_dir)
+                data.add_field("tran", str(pitch_adjust))
+                data.add_field("spk", str(speaker_id))
+                for name, value in self._static_fields:
+                    data.add_field(name, value)
+                data.add_field("k_step", str(k_step))
+                data.add_field("shallow_diffusion", str(shallow_diffusion).lower())
+                data.add_field("only_diffusion", str(only_diffusion).lower())
+                data.add_field("cluster_infer_ratio", str(cluster_infer_ratio))
+                data.add_field("auto_predict_f0", str(auto_predict_f0).lower())
+                data.add_field("noice_scale", str(noice_scale))
+                data.add_field("f0_filter", str(f0_filter).lower())
+                data.add_field("f0_predictor", f0_predictor)
+                data.add_field(
+                    "enhancer_adaptive_key", str(enhancer_adaptive_key)
+                )
+                data.add_field("cr_threshold", str(cr_threshold))
+
+                logger.info("开始转换音频: %s -> %s", input_wav, output_wav)
+                logger.info("So-VITS API: %s/wav2wav 超时 %ss", self.api_url, self.timeout)
+                async with session.post(
+                    f"{self.api_url}/wav2wav", data=data, timeout=timeout
+                ) as response:
+                    logger.info("收到响应，状态码: %s", response.status)
+                    if response.status == 200:
+                        try:
+                            return await _save_wav_response(response)
+                        except Exception as e:
+                            logger.error("保存输出文件时出错: %s", e)
+                            return False
+                    error_msg = await response.text()
+                    logger.error("转换失败！状态码: %s", response.status)
+                    logger.error("错误信息: %s", error_msg)
+                    if (
+                        "not in the speaker list" in error_msg
+                        or "speaker" in error_msg.lower()
+                    ):
+                        try:
+                            detail = _json_loads(error_msg)
+                            msg = detail.get(
+                                "detail", detail.get("message", error_msg)
+                            )
+                        except Exception:
+                            msg = error_msg
+                        models = await self.get_available_models()
+                        hint = (
+                            f"当前可用说话人：{', '.join(models)}。"
+                            if models
+                            else ""
+                        )
+                        setattr(
+                            self,
+                            "_last_convert_error_message",
+                            f"人声转换失败：{msg}。{hint}请使用 /svc_speakers [说话人ID] 设置有效说话人，例如：/svc_speakers 0",
+                        )
+                    return False
             except asyncio.TimeoutError:
                 logger.error("转换请求超时")
                 return False
             except Exception as e:
-                logger.error(f"发送转换请求时出错: {str(e)}")
+                logger.error("发送转换请求时出错: %s", e)
                 return False
+            finally:
+                audio_fp.close()
 
         except Exception as e:
-            logger.error(f"转换过程中发生错误: {str(e)}\n{traceback.format_exc()}")
+            logger.error("转换过程中发生错误: %s", e, exc_info=True)
             return False
 
+# 可用内存读数缓存有效期（秒），混音各阶段的检查在此时间内复用同一次读数
+MEMORY_INFO_TTL = 0.25
+_available_bytes_cache: Optional[Tuple[float, int]] = None
+
+
 def get_memory_info() -> Tuple[float, float, float]:
     """获取内存使用情况
 
@@ -1083,6 +1305,30 @@ def get_memory_info() -> Tuple[float, float, float]:
         mem.available / (1024 * 1024 * 1024)  # 可用内存(GB)
     )
 
+def _read_meminfo_available() -> Optional[int]:
+    """从 /proc/meminfo 读取 MemAvailable（字节），非 Linux 或读取失败返回 None"""
+    try:
+        with open("/proc/meminfo", "rb") as f:
+            for line in f:
+                if line.startswith(b"MemAvailable:"):
+                    return int(line.split()[1]) * 1024  # 单位为 kB
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _available_bytes() -> int:
+    """获取可用内存（字节），短时缓存；Linux 直接读 /proc/meminfo，其他平台回退到 psutil"""
+    global _available_bytes_cache
+    now = time.monotonic()
+    if _available_bytes_cache is not None and now - _available_bytes_cache[0] < MEMORY_INFO_TTL:
+        return _available_bytes_cache[1]
+
+    available = _read_meminfo_available()
+    if available is None:
+        available = psutil.virtual_memory().available
+    _available_bytes_cache = (now, available)
+    return available
+
 def check_memory_safe(file_size: int) -> Tuple[bool, str]:
     """检查内存是否足够处理文件
 
@@ -1092,10 +1338,11 @@ def check_memory_safe(file_size: int) -> Tuple[bool, str]:
     Returns:
         Tuple[bool, str]: (是否安全, 错误信息)
     """
-    total, used, available = get_memory_info()
+    available = _available_bytes() / (1024 * 1024 * 1024)  # 可用内存(GB)
     estimated_memory = file_size * 2 / (1024 * 1024 * 1024)  # 预估所需内存(GB)
 
     if available < estimated_memory * 1.5:  # 预留1.5倍空间
+        total, used, _ = get_memory_info()
         return False, (
             f"内存不足！\n"
             f"系统总内存: {total:.1f}GB\n"
@@ -1109,6 +1356,84 @@ def check_memory_safe(file_size: int) -> Tuple[bool, str]:
         )
     return True, ""
 
+
+# 读取 _conf_schema.json 失败时使用的默认配置结构
+_DEFAULT_SCHEMA_ITEMS = {
+    "command_config": {
+        "description": "命令设置",
+        "type": "object",
+        "hint": "命令相关的配置参数",
+        "items": {
+            "convert_command_aliases": {
+                "description": "转换命令别名",
+                "type": "list",
+                "hint": "转换命令的别名列表，可以自定义多个别名",
+                "default": ["牢剑唱", "转换"],
+                "items": {
+                    "type": "string"
+                }
+            }
+        }
+    }
+}
+
+_config_schema: Optional[Dict] = None
+
+
+def _load_config_schema() -> Dict:
+    """从 _conf_schema.json 构建插件配置结构，失败时回退到默认配置
+
+    Returns:
+        包装在 so_vits_svc_api 下的配置结构
+    """
+    schema_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_conf_schema.json")
+    items = _DEFAULT_SCHEMA_ITEMS
+    try:
+        if os.path.exists(schema_file):
+            with open(schema_file, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        else:
+            logger.warning(f"配置文件 {schema_file} 不存在，使用默认配置")
+    except Exception as e:
+        logger.error(f"读取配置文件时出错: {str(e)}")
+    return {
+        "so_vits_svc_api": {
+            "description": "So-Vits-SVC API 插件配置",
+            "type": "object",
+            "items": items
+        }
+    }
+
+
+# 来源关键字 -> source_type
+SOURCE_KEYWORDS = {"bilibili": "bilibili", "qq": "qqmusic", "douyin": "douyin"}
+
+
+_INT_RE = re.compile(r"[+-]?\d+")
+
+
+def _parse_int(token: str) -> Optional[int]:
+    """把参数解析为整数，不是整数时返回 None（用预编译正则判断，不走异常分支）"""
+    return int(token) if _INT_RE.fullmatch(token) else None
+
+
+def _split_source_args(tokens: List[str]) -> Tuple[str, Optional[str]]:
+    """根据首个参数区分来源类型，返回 (source_type, 内容)
+
+    Args:
+        tokens: 来源关键字（可选）及其后的歌曲名、BV号或链接
+
+    Returns:
+        来源类型与内容，内容为空时返回 None
+    """
+    source_type = SOURCE_KEYWORDS.get(tokens[0].lower()) if tokens else None
+    if source_type:
+        tokens = tokens[1:]
+    else:
+        source_type = "file"
+    return source_type, (" ".join(tokens) or None)
+
+
 @register(
     name="so-vits-svc-api",
     author="Soulter",
@@ -1118,6 +1443,11 @@ def check_memory_safe(file_size: int) -> Tuple[bool, str]:
 class SoVitsSvcPlugin(Star):
     """So-Vits-SVC API 插件主类"""
 
+    # 上传文件不超过该大小（字节）时先在内存中计算摘要，缓存未命中才写入磁盘
+    UPLOAD_SPOOL_LIMIT = 8 * 1024 * 1024
+    # 修改配置后延迟写盘的秒数，期间的多次修改合并为一次保存
+    CONFIG_SAVE_DELAY = 1.0
+
     config: AstrBotConfig  # 实例属性，由 __init__ 赋值
 
     def __init__(self, context: Context, config: AstrBotConfig):
@@ -1131,6 +1461,19 @@ class SoVitsSvcPlugin(Star):
         self.config = config
         self.converter = VoiceConverter(self.config)  # 立即初始化 converter
         self.conversion_tasks = {}  # 存储正在进行的转换任务
+        # 限制同时执行的 分离→转换→混音 流水线数量，其余请求排队等待
+        max_concurrency = max(1, int(self.config.get("voice_config", {}).get("max_concurrency", 2)))
+        self._convert_sem = asyncio.Semaphore(max_concurrency)
+        self._convert_waiting = 0  # 正在排队等待的请求数
+        self._cleanup_tasks: set = set()  # 后台清理临时文件的任务，保持引用防止被回收
+        # 正在处理中的转换（输入摘要+参数 -> 结果缓存路径），相同请求等待其完成后复用结果
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._config_dirty = False  # 配置有未写盘的修改
+        self._save_handle: Optional[asyncio.TimerHandle] = None  # 延迟写盘的定时器
+        # B站/抖音音频需要 ffmpeg 转码，启动时检查一次即可
+        self._ffmpeg_path = shutil.which("ffmpeg")
+        if not self._ffmpeg_path:
+            logger.warning("未找到 ffmpeg，哔哩哔哩和抖音音频转换将不可用")
         self.msst_processor = None  # 延迟初始化 MSST 处理器
         self.douyin_api = None  # 延迟初始化抖音下载器
         self.temp_dir = "data/temp/so-vits-svc"
@@ -1194,83 +1537,12 @@ class SoVitsSvcPlugin(Star):
             _config: AstrBot配置对象（框架可能传入，本方法未使用）
 
         Returns:
-            Dict: 配置结构定义
+            Dict: 配置结构定义（首次调用时构建，之后直接返回同一对象）
         """
-        try:
-            # 从 _conf_schema.json 文件中读取配置结构
-            import json
-            import os
-            
-            # 获取当前文件所在目录
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            schema_file = os.path.join(current_dir, "_conf_schema.json")
-            
-            if os.path.exists(schema_file):
-                with open(schema_file, 'r', encoding='utf-8') as f:
-                    schema_config = json.load(f)
-                
-                # 返回包装在 so_vits_svc_api 下的配置结构
-                return {
-                    "so_vits_svc_api": {
-                        "description": "So-Vits-SVC API 插件配置",
-                        "type": "object",
-                        "items": schema_config
-                    }
-                }
-            else:
-                logger.warning(f"配置文件 {schema_file} 不存在，使用默认配置")
-                # 如果文件不存在，返回默认配置
-                return {
-                    "so_vits_svc_api": {
-                        "description": "So-Vits-SVC API 插件配置",
-                        "type": "object",
-                        "items": {
-                            "command_config": {
-                                "description": "命令设置",
-                                "type": "object",
-                                "hint": "命令相关的配置参数",
-                                "items": {
-                                    "convert_command_aliases": {
-                                        "description": "转换命令别名",
-                                        "type": "list",
-                                        "hint": "转换命令的别名列表，可以自定义多个别名",
-                                        "default": ["牢剑唱", "转换"],
-                                        "items": {
-                                            "type": "string"
-                                        }
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-        except Exception as e:
-            logger.error(f"读取配置文件时出错: {str(e)}")
-            # 如果读取失败，返回默认配置
-            return {
-                "so_vits_svc_api": {
-                    "description": "So-Vits-SVC API 插件配置",
-                    "type": "object",
-                    "items": {
-                        "command_config": {
-                            "description": "命令设置",
-                            "type": "object",
-                            "hint": "命令相关的配置参数",
-                            "items": {
-                                "convert_command_aliases": {
-                                    "description": "转换命令别名",
-                                    "type": "list",
-                                    "hint": "转换命令的别名列表，可以自定义多个别名",
-                                    "default": ["牢剑唱", "转换"],
-                                    "items": {
-                                        "type": "string"
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
-            }
+        global _config_schema
+        if _config_schema is None:
+            _config_schema = _load_config_schema()
+        return _config_schema
 
     def _update_douyin_config(self) -> None:
         """将 base_setting.douyin_cookie 同步到 douyin_sdk_config.json（供 douyin_link_sdk 读取）"""
@@ -1286,28 +1558,79 @@ class SoVitsSvcPlugin(Star):
             logger.info("开始更新抖音配置...")
             
             # 导入配置更新模块
-            from .update_douyin_config import load_config_yaml, update_config_yaml, save_config_yaml
-            
-            config = load_config_yaml()
-            if config is None:
-                logger.error("无法加载或解析抖音 SDK 配置文件（douyin_sdk_config.json）")
-                return
-            
-            # 更新配置
-            if not update_config_yaml(config, douyin_cookie):
-                logger.error("更新抖音 SDK 配置失败")
-                return
-            
-            # 保存配置
-            if not save_config_yaml(config):
-                logger.error("保存抖音 SDK 配置失败")
+            from .update_douyin_config import sync_douyin_cookie
+
+            if not sync_douyin_cookie(douyin_cookie):
+                logger.error("更新抖音 SDK 配置文件（douyin_sdk_config.json）失败")
                 return
-            
+
             logger.info("抖音配置更新成功")
                 
         except Exception as e:
             logger.error(f"更新抖音配置时出错: {str(e)}")
 
+    @staticmethod
+    def _args(event: AstrMessageEvent) -> List[str]:
+        """取命令名之后的参数列表（split() 本身会忽略首尾空白）"""
+        message = event.message_str
+        return message.split()[1:] if message else []
+
+    def _make_temp_file(self, kind: str, cleanup: contextlib.ExitStack) -> str:
+        """在临时目录中原子创建一个空 WAV 文件，并登记到 cleanup 中在结束时删除
+
+        Args:
+            kind: 文件名前缀，如 input、output
+            cleanup: 负责清理的 ExitStack
+
+        Returns:
+            临时文件路径
+        """
+        fd, path = tempfile.mkstemp(prefix=f"{kind}_", suffix=".wav", dir=self.temp_dir)
+        os.close(fd)
+        cleanup.callback(_remove_file_quietly, path)
+        return path
+
+    def _schedule_cleanup(self, cleanup: contextlib.ExitStack) -> None:
+        """在后台线程中执行临时文件清理，没有运行中的事件循环时直接同步清理
+
+        Args:
+            cleanup: 登记了临时文件的 ExitStack
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            cleanup.close()
+            return
+        # 独立任务不随请求处理协程一起被取消
+        task = loop.create_task(asyncio.to_thread(cleanup.close))
+        self._cleanup_tasks.add(task)
+        task.add_done_callback(self._cleanup_tasks.discard)
+
+    def _schedule_save(self) -> None:
+        """标记配置已修改，并在 CONFIG_SAVE_DELAY 秒后统一写盘，合并短时间内的多次修改"""
+        self._config_dirty = True
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_config()
+            return
+        self._save_handle = loop.call_later(self.CONFIG_SAVE_DELAY, self._flush_config)
+
+    def _flush_config(self) -> None:
+        """有未写盘的修改时保存配置"""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        if not self._config_dirty:
+            return
+        self._config_dirty = False
+        try:
+            self.config.save_config()
+        except Exception as e:
+            logger.error(f"保存配置失败: {str(e)}")
+
     async def _init_config(self) -> None:
         """初始化配置"""
         # 初始化 MSST 处理器
@@ -1324,6 +1647,18 @@ class SoVitsSvcPlugin(Star):
         self.douyin_api = DouyinAudioAPI(**douyin_config)
         await self.msst_processor.initialize()
 
+    async def terminate(self):
+        """插件卸载时写入未保存的配置、等待临时文件清理完成，并关闭复用的 HTTP 会话"""
+        self._flush_config()
+        if self._cleanup_tasks:
+            await asyncio.gather(*self._cleanup_tasks, return_exceptions=True)
+        await self.converter.close()
+        if self.msst_processor is not None:
+            await self.msst_processor.close()
+        from .song import close_client
+
+        await close_client()
+
     @command("helloworld")
     async def helloworld(self, event: AstrMessageEvent):
         """测试插件是否正常工作"""
@@ -1333,7 +1668,7 @@ class SoVitsSvcPlugin(Star):
     @command("svc_status")
     async def check_status(self, event: AstrMessageEvent):
         """检查服务状态"""
-        health = await self.converter.check_health()
+        health = await self.converter.check_health(use_cache=False)
         if not health:
             hint = (
                 "请检查 DDSP Reflow API（uvicorn ddspsvc_6_3.api_reflow:app）是否已启动。"
@@ -1380,30 +1715,41 @@ class SoVitsSvcPlugin(Star):
 
     async def _handle_convert_voice(self, event: AstrMessageEvent) -> AsyncGenerator[Any, None]:
         """转换语音"""
-        # 生成任务ID（在函数开始就定义，避免后续引用错误）
-        task_id = str(uuid.uuid4())
-        
+        # 生成任务ID（在函数开始就定义，避免后续引用错误；取前 8 位便于在聊天中输入）
+        task_id = uuid.uuid4().hex[:8]
+        sem_acquired = False
+        health_task: Optional[asyncio.Task] = None
+        inflight: Optional[asyncio.Future] = None
+        inflight_key: Optional[tuple] = None
+        # 本次请求反复用到的组件，绑定为局部变量
+        cache_manager = self.converter.cache_manager
+        msst = self.converter.msst_processor
+        cleanup = contextlib.ExitStack()  # 登记本次请求产生的临时文件
+
         try:
             # 解析参数
-            message = event.message_str.strip()
-            args = message.split()[1:] if message else []
+            args = self._args(event)
             speaker_id = 0  # 默认说话人ID为0
             pitch_adjust = 0  # 默认音调调整为0
             song_name = None
             source_type = "file"  # 默认为文件上传
-            model_dir = None  # 默认使用配置中的模型目录
-
-            only_chorus = False
-            quick_cut = False
             quick_duration = 60  # 默认1分钟
-            
-            if "-c" in args:
-                only_chorus = True
-                args.remove("-c")
-                
-            if "-q" in args:
-                quick_cut = True
-                args.remove("-q")
+
+            # 一次性解析 -c / -q / -nomix / -m 选项，其余按位置参数处理
+            try:
+                parsed = parse_convert_flags(args)
+            except ValueError as e:
+                yield event.plain_result(f"参数解析错误：{str(e)}")
+                return
+            only_chorus = parsed.only_chorus
+            quick_cut = parsed.quick_cut
+            no_mix = parsed.no_mix
+            model_dir = parsed.model_dir
+            # -nomix：输入本身就是人声（清唱、语音等），跳过 MSST 分离与混音
+            mix_enabled = self.converter.enable_mixing and not no_mix
+            args = parsed.rest
+
+            if quick_cut:
                 # 检查是否有指定时长参数
                 if len(args) >= 3 and args[2].isdigit():
                     quick_duration = int(args[2])
@@ -1415,192 +1761,72 @@ class SoVitsSvcPlugin(Star):
             # 参数解析阶段，只设置变量，不做下载和处理
             if len(args) >= 1:
                 # 首先检查第一个参数是否是数字（说话人ID）
-                try:
-                    speaker_id = int(args[0])
+                numeric_speaker = _parse_int(args[0])
+                if numeric_speaker is not None:
+                    speaker_id = numeric_speaker
                     # 如果第一个参数是数字，继续检查第二个参数
                     if len(args) >= 2:
-                        try:
-                            pitch_adjust = int(args[1])
-                            if not -12 <= pitch_adjust <= 12:
-                                raise ValueError("音调调整必须在-12到12之间")
-                        except ValueError as e:
-                            yield event.plain_result(f"音调调整参数错误：{str(e)}")
+                        pitch = _parse_int(args[1])
+                        if pitch is None:
+                            yield event.plain_result(f"音调调整参数错误：{args[1]} 不是整数")
                             return
-                    
+                        if not -12 <= pitch <= 12:
+                            yield event.plain_result("音调调整参数错误：音调调整必须在-12到12之间")
+                            return
+                        pitch_adjust = pitch
                     # 如果前两个参数都是数字，检查第三个参数是否是来源类型
                     if len(args) > 2:
-                        if args[2].lower() == "bilibili":
-                            source_type = "bilibili"
-                            if len(args) > 3:
-                                # 检查是否指定了模型目录
-                                model_index = -1
-                                for i, arg in enumerate(args):
-                                    if arg == "-m" and i + 1 < len(args):
-                                        model_index = i
-                                        break
-
-                                if model_index != -1:
-                                    # 如果找到了-m参数，提取模型目录和BV号
-                                    model_dir = args[model_index + 1]
-                                    song_name = " ".join(args[3:model_index])
-                                else:
-                                    # 如果没有找到-m参数，整个剩余部分都是BV号
-                                    song_name = " ".join(args[3:])
-                        elif args[2].lower() == "qq":
-                            source_type = "qqmusic"
-                            if len(args) > 3:
-                                # 检查是否指定了模型目录
-                                model_index = -1
-                                for i, arg in enumerate(args):
-                                    if arg == "-m" and i + 1 < len(args):
-                                        model_index = i
-                                        break
-
-                                if model_index != -1:
-                                    # 如果找到了-m参数，提取模型目录和歌曲名
-                                    model_dir = args[model_index + 1]
-                                    song_name = " ".join(args[3:model_index])
-                                else:
-                                    # 如果没有找到-m参数，整个剩余部分都是歌曲名
-                                    song_name = " ".join(args[3:])
-                        elif args[2].lower() == "douyin":
-                            source_type = "douyin"
-                            if len(args) > 3:
-                                # 检查是否指定了模型目录
-                                model_index = -1
-                                for i, arg in enumerate(args):
-                                    if arg == "-m" and i + 1 < len(args):
-                                        model_index = i
-                                        break
-
-                                if model_index != -1:
-                                    # 如果找到了-m参数，提取模型目录和抖音链接
-                                    model_dir = args[model_index + 1]
-                                    song_name = " ".join(args[3:model_index])
-                                else:
-                                    # 如果没有找到-m参数，整个剩余部分都是抖音链接
-                                    song_name = " ".join(args[3:])
-                        else:
-                            # 检查是否指定了模型目录
-                            model_index = -1
-                            for i, arg in enumerate(args):
-                                if arg == "-m" and i + 1 < len(args):
-                                    model_index = i
-                                    break
-
-                            if model_index != -1:
-                                # 如果找到了-m参数，提取模型目录和歌曲名
-                                model_dir = args[model_index + 1]
-                                song_name = " ".join(args[2:model_index])
-                            else:
-                                # 如果没有找到-m参数，整个剩余部分都是歌曲名
-                                song_name = " ".join(args[2:])
-                except ValueError:
+                        source_type, song_name = _split_source_args(args[2:])
+                elif args[0].lower() in SOURCE_KEYWORDS:
                     # 如果第一个参数不是数字，检查是否是来源类型
-                    if args[0].lower() == "bilibili":
-                        source_type = "bilibili"
-                        if len(args) > 1:
-                            # 检查是否指定了模型目录
-                            model_index = -1
-                            for i, arg in enumerate(args):
-                                if arg == "-m" and i + 1 < len(args):
-                                    model_index = i
-                                    break
-
-                            if model_index != -1:
-                                # 如果找到了-m参数，提取模型目录和BV号
-                                model_dir = args[model_index + 1]
-                                song_name = " ".join(args[1:model_index])
-                            else:
-                                # 如果没有找到-m参数，整个剩余部分都是BV号
-                                song_name = " ".join(args[1:])
-                    elif args[0].lower() == "qq":
-                        source_type = "qqmusic"
-                        if len(args) > 1:
-                            # 检查是否指定了模型目录
-                            model_index = -1
-                            for i, arg in enumerate(args):
-                                if arg == "-m" and i + 1 < len(args):
-                                    model_index = i
-                                    break
-
-                            if model_index != -1:
-                                # 如果找到了-m参数，提取模型目录和歌曲名
-                                model_dir = args[model_index + 1]
-                                song_name = " ".join(args[1:model_index])
-                            else:
-                                # 如果没有找到-m参数，整个剩余部分都是歌曲名
-                                song_name = " ".join(args[1:])
-                    elif args[0].lower() == "douyin":
-                        source_type = "douyin"
-                        if len(args) > 1:
-                            # 检查是否指定了模型目录
-                            model_index = -1
-                            for i, arg in enumerate(args):
-                                if arg == "-m" and i + 1 < len(args):
-                                    model_index = i
-                                    break
-
-                            if model_index != -1:
-                                # 如果找到了-m参数，提取模型目录和抖音链接
-                                model_dir = args[model_index + 1]
-                                song_name = " ".join(args[1:model_index])
-                            else:
-                                # 如果没有找到-m参数，整个剩余部分都是抖音链接
-                                song_name = " ".join(args[1:])
+                    source_type, song_name = _split_source_args(args)
+                else:
+                    # 首参数为说话人ID（非数字，如 "H"）：args[0]=说话人, args[1]=音调, args[2:] 为来源类型或歌曲名
+                    speaker_id = str(args[0])
+                    if len(args) >= 2:
+                        pitch = _parse_int(args[1])
+                        pitch_adjust = pitch if pitch is not None and -12 <= pitch <= 12 else 0
+                    if len(args) > 2:
+                        source_type, song_name = _split_source_args(args[2:])
                     else:
-                        # 首参数为说话人ID（非数字，如 "H"）：args[0]=说话人, args[1]=音调, args[2:] 为来源类型或歌曲名
-                        speaker_id = str(args[0])
-                        if len(args) >= 2:
-                            try:
-                                pitch_adjust = int(args[1])
-                                if not -12 <= pitch_adjust <= 12:
-                                    pitch_adjust = 0
-                            except ValueError:
-                                pitch_adjust = 0
-                        if len(args) > 2:
-                            if args[2].lower() == "bilibili":
-                                source_type = "bilibili"
-                                model_index = next((i for i, a in enumerate(args) if a == "-m" and i + 1 < len(args)), -1)
-                                song_name = " ".join(args[3:model_index]) if model_index > 3 else " ".join(args[3:])
-                                if model_index != -1:
-                                    model_dir = args[model_index + 1]
-                            elif args[2].lower() == "qq":
-                                source_type = "qqmusic"
-                                model_index = next((i for i, a in enumerate(args) if a == "-m" and i + 1 < len(args)), -1)
-                                song_name = " ".join(args[3:model_index]) if model_index > 3 else " ".join(args[3:])
-                                if model_index != -1:
-                                    model_dir = args[model_index + 1]
-                            elif args[2].lower() == "douyin":
-                                source_type = "douyin"
-                                model_index = next((i for i, a in enumerate(args) if a == "-m" and i + 1 < len(args)), -1)
-                                song_name = " ".join(args[3:model_index]) if model_index > 3 else " ".join(args[3:])
-                                if model_index != -1:
-                                    model_dir = args[model_index + 1]
-                            else:
-                                model_index = next((i for i, a in enumerate(args) if a == "-m" and i + 1 < len(args)), -1)
-                                song_name = " ".join(args[2:model_index]) if model_index > 2 else " ".join(args[2:])
-                                if model_index != -1:
-                                    model_dir = args[model_index + 1]
-                        else:
-                            model_index = next((i for i, a in enumerate(args) if a == "-m" and i + 1 < len(args)), -1)
-                            song_name = " ".join(args[0:model_index]) if model_index != -1 else " ".join(args[0:])
-                            if model_index != -1:
-                                model_dir = args[model_index + 1]
+                        song_name = " ".join(args)
 
             # 统一为 str，保证传给缓存与 So-VITS-SVC API 的 speaker_id 一致
             speaker_id = str(speaker_id)
 
-            # 生成临时文件路径
-            input_file = os.path.join(self.temp_dir, f"input_{uuid.uuid4()}.wav")
-            output_file = os.path.join(self.temp_dir, f"output_{uuid.uuid4()}.wav")
-            mixed_file = os.path.join(self.temp_dir, f"mixed_{uuid.uuid4()}.wav")
-            vocal_file = os.path.join(self.temp_dir, f"vocal_{uuid.uuid4()}.wav")
-            inst_file = os.path.join(self.temp_dir, f"inst_{uuid.uuid4()}.wav")
+            # 输入音频的 SHA-256 摘要，能在下载时顺带计算的来源会提前填好
+            input_digest: Optional[str] = None
+            # 结果缓存参数（只取决于命令参数，下载前即可确定）
+            cache_params = {
+                **self.converter.default_infer_params,
+                "enable_mixing": mix_enabled,
+                "no_mix": no_mix,
+                "only_chorus": only_chorus,  # 新增，确保副歌和非副歌缓存分离
+                "quick_cut": quick_cut,  # 新增，确保快速截取缓存分离
+                "quick_duration": quick_duration,  # 新增，确保不同时长缓存分离
+            }
+            # 短于该时长的音频按 -nomix 处理，解码得到时长后才能确定最终的缓存参数
+            skip_msst_under = float(
+                self.config.get("voice_config", {}).get("skip_msst_under_seconds", 0) or 0
+            )
+
+            # 生成临时文件路径（创建即登记清理，任何退出路径都会删除）
+            input_file = self._make_temp_file("input", cleanup)
+            output_file = self._make_temp_file("output", cleanup)
+            mixed_file = self._make_temp_file("mixed", cleanup)
+            vocal_file = self._make_temp_file("vocal", cleanup)
+            inst_file = self._make_temp_file("inst", cleanup)
+
+            # 下载/准备音频的同时探测转换服务状态，服务不可用时在 MSST 分离前尽早失败
+            health_task = asyncio.create_task(self.converter.check_health())
 
             # 统一用 source_type 进入分支
             song_info = None
             # 只保留一次bilibili实际处理分支
+            if source_type in ("bilibili", "douyin") and song_name and not self._ffmpeg_path:
+                yield event.plain_result("未找到 ffmpeg，无法处理哔哩哔哩/抖音音频，请先安装 ffmpeg 并加入 PATH")
+                return
+
             if source_type == "bilibili" and song_name:
                 try:
                     # 用正则提取BV号
@@ -1608,7 +1834,8 @@ class SoVitsSvcPlugin(Star):
                     cookie = self.config.get("base_setting", {}).get("bbdown_cookie", "")
 
                     # 获取视频信息
-                    info = await bilibili_api.fetch_bilibili_video_info(bvid, cookie=cookie)
+                    bili_session = await self.converter.get_session()
+                    info = await bilibili_api.fetch_bilibili_video_info(bvid, cookie=cookie, session=bili_session)
                     song_info = {"bvid": bvid}
 
                     # 合并输出视频信息和处理提示（链式消息）
@@ -1633,18 +1860,11 @@ class SoVitsSvcPlugin(Star):
                             chain.append(Comp.Image.fromURL(info["pic"]))
                     yield event.chain_result(chain)
 
-                    # 下载前清理临时目录，避免历史文件干扰
-                    for f in os.listdir(self.temp_dir):
-                        try:
-                            os.remove(os.path.join(self.temp_dir, f))
-                        except Exception as e:
-                            logger.warning(f"清理临时文件失败: {f}, {str(e)}")
-
-                    # 下载前后文件列表对比，只处理新生成的音频文件
-                    before_files = set(os.listdir(self.temp_dir))
-                    await bilibili_api.download_bilibili_audio(bvid, self.temp_dir,only_audio=True,cookie=cookie)
-                    after_files = set(os.listdir(self.temp_dir))
-                    new_files = after_files - before_files
+                    # 每个请求下载到独立的子目录，不与其他并发请求的临时文件互相干扰
+                    download_dir = tempfile.mkdtemp(prefix="bili_", dir=self.temp_dir)
+                    cleanup.callback(shutil.rmtree, download_dir, ignore_errors=True)
+                    await bilibili_api.download_bilibili_audio(bvid, download_dir, only_audio=True, cookie=cookie, session=bili_session)
+                    new_files = await asyncio.to_thread(_list_files, download_dir)
 
                     # 查找下载的音频文件（支持多种格式，优先无损）
                     audio_file = None
@@ -1652,7 +1872,7 @@ class SoVitsSvcPlugin(Star):
                     for ext in audio_ext_priority:
                         for f in new_files:
                             if f.endswith(ext):
-                                audio_file = os.path.join(self.temp_dir, f)
+                                audio_file = os.path.join(download_dir, f)
                                 break
                         if audio_file:
                             break
@@ -1663,14 +1883,14 @@ class SoVitsSvcPlugin(Star):
                     if not audio_file.endswith(".wav"):
                         wav_file = os.path.splitext(audio_file)[0] + ".wav"
                         proc = await asyncio.create_subprocess_exec(
-                            "ffmpeg", "-y", "-i", audio_file, wav_file
+                            self._ffmpeg_path, "-y", "-i", audio_file, wav_file
                         )
                         await proc.communicate()
+                        cleanup.callback(_remove_file_quietly, audio_file)
                         audio_file = wav_file
 
-                    # 复制音频到input_file
-                    import shutil
-                    shutil.copy(audio_file, input_file)
+                    # 移动音频到input_file（同一文件系统内只改目录项，不复制数据）
+                    await asyncio.to_thread(_move_file, audio_file, input_file)
 
                 except Exception as e:
                     logger.error(f"处理哔哩哔哩视频时出错: {str(e)}")
@@ -1728,7 +1948,7 @@ class SoVitsSvcPlugin(Star):
                         return
 
                     if os.path.exists(downloaded_file):
-                        os.rename(downloaded_file, input_file)
+                        await asyncio.to_thread(_move_file, downloaded_file, input_file)
                     else:
                         yield event.plain_result("下载的QQ音乐文件不存在！")
                         return
@@ -1807,14 +2027,14 @@ class SoVitsSvcPlugin(Star):
                     if not audio_file.endswith(".wav"):
                         wav_file = os.path.splitext(audio_file)[0] + ".wav"
                         proc = await asyncio.create_subprocess_exec(
-                            "ffmpeg", "-y", "-i", audio_file, wav_file
+                            self._ffmpeg_path, "-y", "-i", audio_file, wav_file
                         )
                         await proc.communicate()
+                        cleanup.callback(_remove_file_quietly, audio_file)
                         audio_file = wav_file
 
-                    # 复制音频到input_file
-                    import shutil
-                    shutil.copy(audio_file, input_file)
+                    # 移动音频到input_file（同一文件系统内只改目录项，不复制数据）
+                    await asyncio.to_thread(_move_file, audio_file, input_file)
 
                     # 设置song_info用于缓存
                     song_info = {
@@ -1876,19 +2096,14 @@ class SoVitsSvcPlugin(Star):
                             chain.append(Comp.Image.fromURL(song_info["pic"]))
                     yield event.chain_result(chain)
 
+                    # 直接下载到本次请求的临时文件，不再经过按歌名命名的中间文件
                     downloaded_file = await self.converter.netease_api.download_song(
-                        song_info, self.temp_dir
+                        song_info, target_path=input_file
                     )
                     if not downloaded_file:
                         yield event.plain_result("下载歌曲失败！")
                         return
 
-                    if os.path.exists(downloaded_file):
-                        os.rename(downloaded_file, input_file)
-                    else:
-                        yield event.plain_result("下载的文件不存在！")
-                        return
-
                 except Exception as e:
                     logger.error(f"处理歌曲时出错: {str(e)}")
                     yield event.plain_result(f"搜索/下载歌曲时出错：{str(e)}")
@@ -1922,6 +2137,7 @@ class SoVitsSvcPlugin(Star):
                         "7. /唱 [说话人ID] [音调调整] [歌曲名] -m [模型目录] - 使用指定模型目录转换（可选）\n"
                         "8. /唱 [说话人ID] [音调调整] [歌曲名] -q [时长] - 快速截取（跳过前30秒，保留指定时长，默认60秒）\n"
                         "9. /唱 [说话人ID] [音调调整] [歌曲名] -c - 只转换副歌部分\n"
+                        "10. /唱 [说话人ID] [音调调整] -nomix - 上传清唱/语音，跳过人声分离与混音\n"
                         "\n注意：说话人ID和音调调整参数是可选的，如果不填写将使用默认值（0 0）\n"
                         f"注意：您也可以使用别名 {alias_text} 来执行相同的功能"
                     )
@@ -1940,61 +2156,68 @@ class SoVitsSvcPlugin(Star):
 
                 yield event.plain_result("正在处理上传的音频文件...")
                 if hasattr(file, "url"):
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(file.url, timeout=self.converter.timeout) as response:
-                            with open(input_file, "wb") as f:
-                                f.write(await response.read())
+                    # 只限制单次读取超时，大文件下载不会因总时长被中断
+                    download_timeout = aiohttp.ClientTimeout(
+                        total=None, sock_read=float(self.converter.timeout)
+                    )
+                    session = await self.converter.get_session()
+                    digest = hashlib.sha256()
+                    # 边下载边计算摘要；小文件先留在内存中，命中缓存时无需落盘
+                    spool = bytearray()
+                    async with contextlib.AsyncExitStack() as stack:
+                        response = await stack.enter_async_context(
+                            session.get(file.url, timeout=download_timeout)
+                        )
+                        f = None
+                        async for chunk in response.content.iter_chunked(64 * 1024):
+                            digest.update(chunk)
+                            if f is None:
+                                spool += chunk
+                                if len(spool) <= self.UPLOAD_SPOOL_LIMIT:
+                                    continue
+                                # 超过内存上限，转为直接写入文件
+                                f = await stack.enter_async_context(aiofiles.open(input_file, "wb"))
+                                chunk = bytes(spool)
+                                spool = bytearray()
+                            await f.write(chunk)
+                    input_digest = digest.hexdigest()
+
+                    # 缓存参数可能随时长改变时，留到时长检查后再查缓存
+                    if no_mix or not skip_msst_under:
+                        cached_file = cache_manager.get_cache_by_digest(
+                            input_digest, speaker_id, pitch_adjust, **cache_params
+                        )
+                        if cached_file:
+                            logger.info("使用缓存: %s", cached_file)
+                            yield event.chain_result([Comp.Record(file=cached_file, url=cached_file)])
+                            return
+                    if spool:
+                        async with aiofiles.open(input_file, "wb") as f:
+                            await f.write(spool)
                 elif hasattr(file, "path"):
-                    with open(file.path, "rb") as src, open(input_file, "wb") as dst:
-                        dst.write(src.read())
+                    # copyfile 在 Linux 上走 sendfile，放到线程中执行避免阻塞事件循环
+                    await asyncio.to_thread(shutil.copyfile, file.path, input_file)
                 else:
                     yield event.plain_result("无法处理此类型的文件！")
                     return
 
             # 确保输入文件已完整写入后再进入 MSST（Agent 用 convert_voice 时等待下载/写入完毕）
             for _ in range(50):
-                if os.path.exists(input_file) and os.path.getsize(input_file) > 0:
-                    break
+                try:
+                    if os.stat(input_file).st_size > 0:
+                        break
+                except FileNotFoundError:
+                    pass
                 await asyncio.sleep(0.1)
             else:
                 yield event.plain_result("输入文件未就绪，请稍后重试。")
                 return
 
-            # 检查缓存
-            cache_params = {
-                "k_step": self.converter.default_k_step,
-                "shallow_diffusion": self.converter.default_shallow_diffusion,
-                "only_diffusion": self.converter.default_only_diffusion,
-                "cluster_infer_ratio": self.converter.default_cluster_infer_ratio,
-                "auto_predict_f0": self.converter.default_auto_predict_f0,
-                "noice_scale": self.converter.default_noice_scale,
-                "f0_filter": self.converter.default_f0_filter,
-                "f0_predictor": self.converter.default_f0_predictor,
-                "enhancer_adaptive_key": self.converter.default_enhancer_adaptive_key,
-                "cr_threshold": self.converter.default_cr_threshold,
-                "enable_mixing": self.converter.enable_mixing,
-                "only_chorus": only_chorus,  # 新增，确保副歌和非副歌缓存分离
-                "quick_cut": quick_cut,  # 新增，确保快速截取缓存分离
-                "quick_duration": quick_duration,  # 新增，确保不同时长缓存分离
-            }
-
-            # 获取缓存
-            cached_file = self.converter.cache_manager.get_cache(
-                input_file,  # 使用原始输入文件
-                speaker_id,
-                pitch_adjust,
-                **cache_params
-            )
-
-            if cached_file:
-                logger.info(f"使用缓存: {cached_file}")
-                chain = [Comp.Record(file=cached_file, url=cached_file)]
-                yield event.chain_result(chain)
-                return
+            from pydub import AudioSegment
 
             # 音频文件准备好后，检查音频时长
             try:
-                audio = AudioSegment.from_file(input_file)
+                audio = await asyncio.to_thread(AudioSegment.from_file, input_file)
                 total_duration = len(audio) / 1000  # 转换为秒
                 
                 # 从配置中读取时长限制设置
@@ -2013,12 +2236,58 @@ class SoVitsSvcPlugin(Star):
                     )
                     return
                     
-                logger.info(f"音频时长检查通过：{total_duration:.1f}秒")
+                logger.info("音频时长检查通过：%.1f秒", total_duration)
+
+                # 很短的音频多为语音/清唱，按 -nomix 处理，省去 MSST 分离
+                if not no_mix and total_duration < skip_msst_under:
+                    logger.info(
+                        "音频时长 %.1f 秒短于 %.1f 秒，跳过人声分离与混音", total_duration, skip_msst_under
+                    )
+                    no_mix = True
+                    mix_enabled = False
+                    cache_params["enable_mixing"] = False
+                    cache_params["no_mix"] = True
             except Exception as e:
                 logger.error(f"音频时长检查失败: {str(e)}")
                 yield event.plain_result(f"音频时长检查失败：{str(e)}")
                 return
 
+            # 获取缓存（按原始输入音频的完整摘要，截取副歌/快速截取后也能命中）
+            if input_digest is None:
+                input_digest = await asyncio.to_thread(CacheManager.file_digest, input_file)
+            source_file = input_file
+            cached_file = cache_manager.get_cache_by_digest(
+                input_digest,
+                speaker_id,
+                pitch_adjust,
+                **cache_params
+            )
+
+            if cached_file:
+                logger.info("使用缓存: %s", cached_file)
+                chain = [Comp.Record(file=cached_file, url=cached_file)]
+                yield event.chain_result(chain)
+                return
+
+            # 相同输入与参数的转换正在进行时，等它完成后直接发送其缓存结果，不重复分离和转换
+            inflight_key = (
+                input_digest, speaker_id, pitch_adjust, model_dir,
+                tuple(sorted(cache_params.items())),
+            )
+            pending = self._inflight.get(inflight_key)
+            if pending is not None:
+                yield event.plain_result("相同的转换正在进行中，完成后将直接发送结果...")
+                # shield：本请求被取消时不影响正在处理的那一个
+                cached_file = await asyncio.shield(pending)
+                if cached_file:
+                    logger.info("复用进行中转换的结果: %s", cached_file)
+                    chain = [Comp.Record(file=cached_file, url=cached_file)]
+                    yield event.chain_result(chain)
+                    return
+            if inflight_key not in self._inflight:
+                inflight = asyncio.get_running_loop().create_future()
+                self._inflight[inflight_key] = inflight
+
             # 音频文件准备好后，推理前裁切副歌或快速截取
             if only_chorus:
                 try:
@@ -2029,37 +2298,53 @@ class SoVitsSvcPlugin(Star):
                         chorus_cache_key, is_custom_key = get_chorus_cache_key("netease", song_info, input_file)
                     else:
                         chorus_cache_key, is_custom_key = get_chorus_cache_key(source_type, song_info, input_file)
-                    logger.info(f"副歌缓存key: {chorus_cache_key}, is_custom_key: {is_custom_key}, song_info: {song_info}, source_type: {source_type}")
-                    chorus_interval = self.converter.cache_manager.get_chorus_interval(chorus_cache_key, is_custom_key)
+                    logger.info(
+                        "副歌缓存key: %s, is_custom_key: %s, song_info: %s, source_type: %s",
+                        chorus_cache_key, is_custom_key, song_info, source_type,
+                    )
+                    chorus_interval = cache_manager.get_chorus_interval(chorus_cache_key, is_custom_key)
                     if chorus_interval:
                         audio_file_for_cut = input_file if is_custom_key else input_file
-                        start = int(chorus_interval["start"] * 1000)
-                        end = int(chorus_interval["end"] * 1000)
-                        audio = AudioSegment.from_file(audio_file_for_cut)
-                        chorus_audio = audio[start:end]
                         chorus_path = audio_file_for_cut.replace(".wav", "_chorus.wav")
-                        chorus_audio.export(chorus_path, format="wav")
+                        await asyncio.to_thread(
+                            cut_audio_segment,
+                            audio_file_for_cut,
+                            chorus_path,
+                            chorus_interval["start"],
+                            chorus_interval["end"],
+                        )
+                        cleanup.callback(_remove_file_quietly, chorus_path)
                         input_file = chorus_path
                     else:
                         audio_file_for_cut = input_file if is_custom_key else input_file
-                        with open(audio_file_for_cut, "rb") as f:
-                            audio_bytes = f.read()
+                        from .song import detect_chorus_api
+
                         volc_conf = self.config.get("volc_chorus", {})
-                        logger.info(f"副歌检测API请求: key={chorus_cache_key}, is_custom_key={is_custom_key}")
-                        chorus_result = await detect_chorus_api(audio_bytes, volc_conf)
+                        logger.info("副歌检测API请求: key=%s, is_custom_key=%s", chorus_cache_key, is_custom_key)
+                        # 直接把文件映射传给检测接口，不再额外复制一份完整的 bytes
+                        with open(audio_file_for_cut, "rb") as f, mmap.mmap(
+                            f.fileno(), 0, access=mmap.ACCESS_READ
+                        ) as audio_buffer:
+                            chorus_result = await detect_chorus_api(audio_buffer, volc_conf)
                         if chorus_result.get("msg") == "success":
-                            start = int(chorus_result["chorus"]["start"] * 1000)  # ms
-                            end = int(chorus_result["chorus"]["end"] * 1000)
-                            audio = AudioSegment.from_file(audio_file_for_cut)
-                            chorus_audio = audio[start:end]
                             chorus_path = audio_file_for_cut.replace(".wav", "_chorus.wav")
-                            chorus_audio.export(chorus_path, format="wav")
+                            await asyncio.to_thread(
+                                cut_audio_segment,
+                                audio_file_for_cut,
+                                chorus_path,
+                                chorus_result["chorus"]["start"],
+                                chorus_result["chorus"]["end"],
+                            )
+                            cleanup.callback(_remove_file_quietly, chorus_path)
                             input_file = chorus_path  # 后续流程用副歌片段
                             # 写入缓存
-                            self.converter.cache_manager.save_chorus_interval(
+                            cache_manager.save_chorus_interval(
                                 chorus_cache_key, chorus_result["chorus"], is_custom_key
                             )
-                            logger.info(f"副歌区间写入缓存: key={chorus_cache_key}, is_custom_key={is_custom_key}, value={chorus_result['chorus']}")
+                            logger.info(
+                                "副歌区间写入缓存: key=%s, is_custom_key=%s, value=%s",
+                                chorus_cache_key, is_custom_key, chorus_result["chorus"],
+                            )
                         else:
                             yield event.plain_result("副歌检测失败：" + str(chorus_result))
                             return
@@ -2068,10 +2353,7 @@ class SoVitsSvcPlugin(Star):
                     return
             elif quick_cut:
                 try:
-                    # 快速截取：跳过前30秒，保留指定时长
-                    audio = AudioSegment.from_file(input_file)
-                    total_duration = len(audio) / 1000  # 转换为秒
-                    
+                    # 快速截取：跳过前30秒，保留指定时长（total_duration 已在时长检查中得到）
                     # 计算截取区间
                     start_time = 30  # 跳过前30秒
                     end_time = min(start_time + quick_duration, total_duration)
@@ -2081,96 +2363,135 @@ class SoVitsSvcPlugin(Star):
                         start_time = max(0, total_duration - quick_duration)
                         end_time = total_duration
                     
-                    # 转换为毫秒
-                    start_ms = int(start_time * 1000)
-                    end_ms = int(end_time * 1000)
-                    
                     # 截取音频
-                    cut_audio = audio[start_ms:end_ms]
                     cut_path = input_file.replace(".wav", "_quick_cut.wav")
-                    cut_audio.export(cut_path, format="wav")
+                    await asyncio.to_thread(
+                        cut_audio_segment, input_file, cut_path, start_time, end_time
+                    )
+                    cleanup.callback(_remove_file_quietly, cut_path)
                     input_file = cut_path
                     
-                    logger.info(f"快速截取完成：跳过前30秒，截取{start_time}-{end_time}秒，总时长{end_time-start_time}秒")
+                    logger.info(
+                        "快速截取完成：跳过前30秒，截取%s-%s秒，总时长%s秒",
+                        start_time, end_time, end_time - start_time,
+                    )
                     
                 except Exception as e:
                     yield event.plain_result(f"快速截取出错：{str(e)}\n{traceback.format_exc()}")
                     return
 
-            # 开始处理流程
+            if not await health_task:
+                yield event.plain_result("转换服务未就绪，请检查 So-Vits-SVC / DDSP Reflow API 服务是否已启动。")
+                return
+
+            # 开始处理流程：并发受限，超过队列上限直接拒绝
+            if self._convert_sem.locked():
+                if self._convert_waiting >= self.converter.max_queue_size:
+                    yield event.plain_result("当前排队任务过多，请稍后再试！")
+                    return
+                yield event.plain_result("当前转换任务较多，已加入队列，请稍候...")
+            self._convert_waiting += 1
+            try:
+                await self._convert_sem.acquire()
+            finally:
+                self._convert_waiting -= 1
+            sem_acquired = True
             # yield event.plain_result("正在使用MSST分离人声和伴奏...")
 
-            # 使用MSST分离人声和伴奏
-            msst_result = await self.converter.msst_processor.process_audio(
-                input_file,
-                self.converter.msst_preset
-            )
+            # 分离结果只取决于输入音频，同一首歌换说话人/音调时直接复用
+            cached_stems = None
+            msst_preset = self.converter.msst_preset
+            if not no_mix:
+                if input_file == source_file:
+                    stem_digest = input_digest
+                else:
+                    stem_digest = await asyncio.to_thread(CacheManager.file_digest, input_file)
+                cached_stems = cache_manager.get_stem_cache(stem_digest, msst_preset)
+            if no_mix:
+                logger.info("已指定 -nomix，跳过人声分离，直接转换输入音频")
+                if input_file == source_file:
+                    # 原始输入可能是 mp3/flac 等格式（仅文件名为 .wav），用已解码的音频写出真正的 WAV
+                    await asyncio.to_thread(audio.export, vocal_file, format="wav")
+                else:
+                    # 副歌/快速截取的结果已是 WAV
+                    vocal_file = input_file
+            elif cached_stems:
+                logger.info("使用分离音轨缓存: %s", stem_digest)
+                # 硬链接到本次的临时文件，不复制音频数据；缓存随后被清理也不影响本次处理
+                await asyncio.to_thread(CacheManager.link_or_copy, cached_stems[0], vocal_file)
+                await asyncio.to_thread(CacheManager.link_or_copy, cached_stems[1], inst_file)
+            else:
+                # 使用MSST分离人声和伴奏
+                msst_result = await msst.process_audio(input_file, msst_preset)
 
-            if not msst_result or msst_result.get("status") != "success":
-                yield event.plain_result(f"MSST处理失败：{msst_result.get('message', '未知错误') if msst_result else '处理失败'}")
-                return
+                if not msst_result or msst_result.get("status") != "success":
+                    yield event.plain_result(f"MSST处理失败：{msst_result.get('message', '未知错误') if msst_result else '处理失败'}")
+                    return
 
-            # 下载分离后的文件
-            try:
-                print("DEBUG: 即将查找人声文件名")
-                vocal_filename = await self.converter.msst_processor.get_latest_output_filename(["vocals_dry", "vocals"])
-                print("DEBUG: 即将查找伴奏文件名")
-                inst_filename = await self.converter.msst_processor.get_latest_output_filename(["other", "instrumental"])
-                if not inst_filename:
-                    print("DEBUG: 没找到other，查找instrumental")
-                    inst_filename = await self.converter.msst_processor.get_latest_output_filename("instrumental")
-
-                # 检查是否获取成功
-                if not vocal_filename or not inst_filename:
-
-                    async with aiohttp.ClientSession() as session:
-                        async with session.get(f"{self.converter.msst_processor.api_url}/list_outputs") as resp:
-                            resp.raise_for_status()
-                            data = await resp.json()
-                            all_files = [f["name"] for f in data.get("files", [])]
-                            print("所有可用输出文件：", all_files)
-                            logger.error(f"所有可用输出文件：{all_files}")
-                            yield event.plain_result(f"找不到分离后的人声或伴奏文件！\n可用文件：{all_files}")
+                # 下载分离后的文件
+                try:
+                    # 优先使用分离结果中给出的输出文件，没有时再请求一次 /list_outputs，
+                    # 人声和伴奏都在同一份列表中查找
+                    output_files = msst.output_files_from_result(msst_result)
+                    if not output_files:
+                        output_files = await msst.list_output_files()
+                    vocal_filename = msst.find_latest_output_filename(output_files, ["vocals_dry", "vocals"])
+                    inst_filename = msst.find_latest_output_filename(output_files, ["other", "instrumental"])
+
+                    # 检查是否获取成功
+                    if not vocal_filename or not inst_filename:
+                        all_files = [f["name"] for f in output_files]
+                        logger.error(f"所有可用输出文件：{all_files}")
+                        yield event.plain_result(f"找不到分离后的人声或伴奏文件！\n可用文件：{all_files}")
                         return
 
-                vocal_download = await self.converter.msst_processor.download_file(
-                    vocal_filename,
-                    vocal_file
-                )
-                inst_download = await self.converter.msst_processor.download_file(
-                    inst_filename,
-                    inst_file
-                )
+                    # 人声和伴奏互不依赖，并发下载
+                    vocal_download, inst_download = await asyncio.gather(
+                        msst.download_file(vocal_filename, vocal_file),
+                        msst.download_file(inst_filename, inst_file),
+                        return_exceptions=True,
+                    )
+                    for download in (vocal_download, inst_download):
+                        if isinstance(download, BaseException):
+                            raise download
 
-                if not vocal_download or not inst_download:
-                    yield event.plain_result("下载分离后的音频文件失败！")
-                    return
+                    if not vocal_download or not inst_download:
+                        yield event.plain_result("下载分离后的音频文件失败！")
+                        return
 
-                if not os.path.exists(vocal_file) or not os.path.exists(inst_file):
-                    yield event.plain_result("未能成功获取分离后的音频文件！")
+                except Exception as e:
+                    logger.error(f"下载分离文件时出错: {str(e)}")
+                    yield event.plain_result(f"下载分离文件时出错：{str(e)}")
                     return
 
-            except Exception as e:
-                logger.error(f"下载分离文件时出错: {str(e)}")
-                yield event.plain_result(f"下载分离文件时出错：{str(e)}")
-                return
+                await asyncio.to_thread(
+                    cache_manager.save_stem_cache,
+                    stem_digest,
+                    vocal_file,
+                    inst_file,
+                    msst_preset,
+                )
 
-            # 检查文件
-            if not os.path.exists(vocal_file):
+            # 检查文件（每个文件只 stat 一次，同时得到存在性与大小）
+            try:
+                vocal_size = os.stat(vocal_file).st_size
+            except FileNotFoundError:
                 logger.error(f"人声文件不存在: {vocal_file}")
                 yield event.plain_result("人声文件不存在")
                 return
 
-            if not os.path.exists(inst_file):
-                logger.error(f"伴奏文件不存在: {inst_file}")
-                yield event.plain_result("伴奏文件不存在")
-                return
+            inst_size = None
+            if not no_mix:
+                try:
+                    inst_size = os.stat(inst_file).st_size
+                except FileNotFoundError:
+                    logger.error(f"伴奏文件不存在: {inst_file}")
+                    yield event.plain_result("伴奏文件不存在")
+                    return
 
-            # 检查文件大小
-            vocal_size = os.path.getsize(vocal_file)
-            inst_size = os.path.getsize(inst_file)
-            logger.info(f"人声文件大小: {vocal_size} 字节")
-            logger.info(f"伴奏文件大小: {inst_size} 字节")
+            logger.info("人声文件大小: %d 字节", vocal_size)
+            if inst_size is not None:
+                logger.info("伴奏文件大小: %d 字节", inst_size)
 
             if vocal_size == 0 or inst_size == 0:
                 logger.error("文件大小为0")
@@ -2187,22 +2508,28 @@ class SoVitsSvcPlugin(Star):
                         output_wav=output_file,
                         speaker_id=speaker_id,
                         pitch_adjust=pitch_adjust,
-                        k_step=self.converter.default_k_step,
-                        shallow_diffusion=self.converter.default_shallow_diffusion,
-                        only_diffusion=self.converter.default_only_diffusion,
-                        cluster_infer_ratio=self.converter.default_cluster_infer_ratio,
-                        auto_predict_f0=self.converter.default_auto_predict_f0,
-                        noice_scale=self.converter.default_noice_scale,
-                        f0_filter=self.converter.default_f0_filter,
-                        f0_predictor=self.converter.default_f0_predictor,
-                        enhancer_adaptive_key=self.converter.default_enhancer_adaptive_key,
-                        cr_threshold=self.converter.default_cr_threshold,
                         model_dir=model_dir,
+                        **self.converter.default_infer_params,
                     )
                 )
+                self.conversion_tasks[task_id] = {
+                    "task": convert_task,
+                    "input_file": input_file,
+                    "output_file": output_file,
+                    "mixed_file": mixed_file,
+                }
+                yield event.plain_result(
+                    f"正在转换人声，任务ID：{task_id}（可用 /cancel_convert {task_id} 取消）"
+                )
 
                 # 等待转换完成
-                convert_success = await convert_task
+                try:
+                    convert_success = await convert_task
+                except asyncio.CancelledError:
+                    if not convert_task.cancelled():
+                        raise
+                    yield event.plain_result("转换任务已取消")
+                    return
 
                 if not convert_success:
                     err_detail = getattr(
@@ -2219,10 +2546,12 @@ class SoVitsSvcPlugin(Star):
                 return
 
             # 混音处理
-            if self.converter.enable_mixing:
+            if mix_enabled:
                 # yield event.plain_result("正在混音处理...")
                 try:
-                    mix_success = self.converter.mix_audio(
+                    # 混音是 CPU 密集操作，放到线程中执行，避免阻塞事件循环
+                    mix_success = await asyncio.to_thread(
+                        self.converter.mix_audio,
                         vocal_path=output_file,  # 使用转换后的人声
                         inst_path=inst_file,     # 使用分离后的伴奏
                         output_path=mixed_file
@@ -2237,188 +2566,134 @@ class SoVitsSvcPlugin(Star):
                     yield event.plain_result(f"混音处理时出错：{str(e)}")
                     return
 
-                # 保存混音后的文件到缓存
-                self.converter.cache_manager.save_cache(
-                    input_file,  # 使用原始输入文件
-                    mixed_file,  # 缓存混音后的文件
-                    speaker_id,
-                    pitch_adjust,
-                    **cache_params
-                )
-
-                # 在发送结果之前添加内存检查
-                if self.converter.enable_mixing:
-                    final_file = mixed_file
-                else:
-                    final_file = output_file
-
-                # 检查文件大小和内存使用情况
-                try:
-                    file_size = os.path.getsize(final_file)
-                    if file_size == 0:
-                        yield event.plain_result("错误：生成的文件大小为0，请检查转换过程")
-                        return
-
-                    is_safe, memory_warning = check_memory_safe(file_size)
-                    if not is_safe:
-                        yield event.plain_result(memory_warning)
-                        return
-
-                    # 使用异步方式读取文件
-                    try:
-                        with open(final_file, "rb") as f:
-                            audio_data = f.read()
-
-                        # 再次检查内存
-                        is_safe, memory_warning = check_memory_safe(len(audio_data))
-                        if not is_safe:
-                            yield event.plain_result(memory_warning)
-                            return
-
-                        # 发送结果
-                        yield event.plain_result("处理完成！正在发送文件...")
-                        chain = [Comp.Record(file=final_file, url=final_file)]
-                        yield event.chain_result(chain)
-
-                        # 立即清理内存
-                        del audio_data
-                        import gc
-                        gc.collect()
-
-                    except MemoryError as e:
-                        logger.error(f"内存不足: {str(e)}")
-                        yield event.plain_result("内存不足，无法处理文件。请尝试缩短音频长度或降低音质。")
-                        return
-                    except IOError as e:
-                        logger.error(f"文件读写错误: {str(e)}")
-                        yield event.plain_result(f"文件读写错误: {str(e)}")
-                        return
-                    except Exception as e:
-                        logger.error(f"发送音频文件时出错: {str(e)}\n{traceback.format_exc()}")
-                        yield event.plain_result(f"发送音频文件时出错: {str(e)}")
-                        return
-
-                except Exception as e:
-                    logger.error(f"检查文件时出错: {str(e)}\n{traceback.format_exc()}")
-                    yield event.plain_result(f"检查文件时出错: {str(e)}")
-                    return
-
+                final_file = mixed_file
             else:
-                # 如果不混音，保存转换后的人声到缓存
-                self.converter.cache_manager.save_cache(
-                    input_file,  # 使用原始输入文件
-                    output_file,  # 缓存转换后的人声文件
-                    speaker_id,
-                    pitch_adjust,
-                    **cache_params
-                )
-
-                # 在发送结果之前添加内存检查
-                if self.converter.enable_mixing:
-                    final_file = mixed_file
-                else:
-                    final_file = output_file
-
-                # 检查文件大小和内存使用情况
-                try:
-                    file_size = os.path.getsize(final_file)
-                    if file_size == 0:
-                        yield event.plain_result("错误：生成的文件大小为0，请检查转换过程")
-                        return
+                final_file = output_file
 
-                    is_safe, memory_warning = check_memory_safe(file_size)
-                    if not is_safe:
-                        yield event.plain_result(memory_warning)
-                        return
-
-                    # 使用异步方式读取文件
-                    try:
-                        with open(final_file, "rb") as f:
-                            audio_data = f.read()
-
-                        # 再次检查内存
-                        is_safe, memory_warning = check_memory_safe(len(audio_data))
-                        if not is_safe:
-                            yield event.plain_result(memory_warning)
-                            return
-
-                        # 发送结果
-                        yield event.plain_result("处理完成！正在发送文件...")
-                        chain = [Comp.Record(file=final_file, url=final_file)]
-                        yield event.chain_result(chain)
-
-                        # 立即清理内存
-                        del audio_data
-                        import gc
-                        gc.collect()
-
-                    except MemoryError as e:
-                        logger.error(f"内存不足: {str(e)}")
-                        yield event.plain_result("内存不足，无法处理文件。请尝试缩短音频长度或降低音质。")
-                        return
-                    except IOError as e:
-                        logger.error(f"文件读写错误: {str(e)}")
-                        yield event.plain_result(f"文件读写错误: {str(e)}")
-                        return
-                    except Exception as e:
-                        logger.error(f"发送音频文件时出错: {str(e)}\n{traceback.format_exc()}")
-                        yield event.plain_result(f"发送音频文件时出错: {str(e)}")
-                        return
+            # 保存最终结果（混音后的文件或转换后的人声）到缓存
+            cached_result = cache_manager.save_cache_by_digest(
+                input_digest,  # 原始输入音频摘要
+                final_file,
+                speaker_id,
+                pitch_adjust,
+                **cache_params
+            )
+            if inflight is not None and not inflight.done():
+                inflight.set_result(cached_result)
 
-                except Exception as e:
-                    logger.error(f"检查文件时出错: {str(e)}\n{traceback.format_exc()}")
-                    yield event.plain_result(f"检查文件时出错: {str(e)}")
-                    return
+            async for result in self._send_final(event, final_file):
+                yield result
 
         except Exception as e:
-            logger.error(f"处理过程中发生错误: {str(e)}\n{traceback.format_exc()}")
+            logger.error("处理过程中发生错误: %s", e, exc_info=True)
             yield event.plain_result(f"处理过程中发生错误：{str(e)}")
         finally:
+            if health_task is not None and not health_task.done():
+                health_task.cancel()
+            if inflight is not None:
+                # 失败或取消时通知等待者自行处理
+                if not inflight.done():
+                    inflight.set_result(None)
+                self._inflight.pop(inflight_key, None)
+            if sem_acquired:
+                self._convert_sem.release()
             # 清理任务
             if task_id in self.conversion_tasks:
                 del self.conversion_tasks[task_id]
-            # 清理临时文件
+            # 结果已发送，临时文件交给后台线程删除，不阻塞当前协程
+            self._schedule_cleanup(cleanup)
+
+    async def _send_final(self, event: AstrMessageEvent, final_file: str) -> AsyncGenerator[Any, None]:
+        """检查最终文件大小与内存余量后发送结果
+
+        Args:
+            event: 消息事件
+            final_file: 要发送的音频文件路径
+        """
+        # 检查文件大小和内存使用情况
+        try:
+            file_size = await aiofiles.os.path.getsize(final_file)
+            if file_size == 0:
+                yield event.plain_result("错误：生成的文件大小为0，请检查转换过程")
+                return
+
+            is_safe, memory_warning = check_memory_safe(file_size)
+            if not is_safe:
+                yield event.plain_result(memory_warning)
+                return
+
+            # Record 直接按路径发送文件，无需先把整个文件读入内存
             try:
-                for file_path in [input_file, output_file, mixed_file, vocal_file, inst_file]:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        # 强制释放文件句柄
-                        import gc
-                        gc.collect()
-            except (OSError, IOError) as e:
-                logger.error(f"清理临时文件失败: {str(e)}\n{traceback.format_exc()}")
+                # 发送结果
+                yield event.plain_result("处理完成！正在发送文件...")
+                chain = [Comp.Record(file=final_file, url=final_file)]
+                yield event.chain_result(chain)
+
+            except MemoryError as e:
+                logger.error(f"内存不足: {str(e)}")
+                yield event.plain_result("内存不足，无法处理文件。请尝试缩短音频长度或降低音质。")
+            except IOError as e:
+                logger.error(f"文件读写错误: {str(e)}")
+                yield event.plain_result(f"文件读写错误: {str(e)}")
+            except Exception as e:
+                logger.error("发送音频文件时出错: %s", e, exc_info=True)
+                yield event.plain_result(f"发送音频文件时出错: {str(e)}")
+
+        except Exception as e:
+            logger.error("检查文件时出错: %s", e, exc_info=True)
+            yield event.plain_result(f"检查文件时出错: {str(e)}")
 
     @permission_type(PermissionType.ADMIN)
     @command("cancel_convert")
     async def cancel_convert(self, event: AstrMessageEvent):
-        """取消正在进行的转换任务"""
+        """取消正在进行的转换任务，可指定任务ID，不指定时取消第一个未完成的任务"""
         if not self.conversion_tasks:
             yield event.plain_result("当前没有正在进行的转换任务")
             return
 
-        for task_id, task_info in list(self.conversion_tasks.items()):
-            task = task_info["task"]
-            if not task.done():
-                task.cancel()
-                try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
-                # 清理临时文件
-                try:
-                    if os.path.exists(task_info["input_file"]):
-                        os.remove(task_info["input_file"])
-                    if os.path.exists(task_info["output_file"]):
-                        os.remove(task_info["output_file"])
-                    if os.path.exists(task_info["mixed_file"]):
-                        os.remove(task_info["mixed_file"])
-                except (OSError, IOError) as e:
-                    logger.error(f"清理临时文件失败: {str(e)}\n{traceback.format_exc()}")
-                del self.conversion_tasks[task_id]
-                yield event.plain_result("已取消转换任务")
+        args = self._args(event)
+        if args:
+            task_id = args[0]
+            task_info = self.conversion_tasks.get(task_id)
+            if task_info is None or task_info["task"].done():
+                pending_ids = [
+                    tid for tid, info in self.conversion_tasks.items() if not info["task"].done()
+                ]
+                if pending_ids:
+                    yield event.plain_result(
+                        f"没有找到可取消的转换任务: {task_id}\n可取消的任务ID：{', '.join(pending_ids)}"
+                    )
+                else:
+                    yield event.plain_result(f"没有找到可取消的转换任务: {task_id}")
                 return
+        else:
+            task_id = next(
+                (tid for tid, info in self.conversion_tasks.items() if not info["task"].done()),
+                None,
+            )
+            if task_id is None:
+                yield event.plain_result("没有找到可取消的转换任务")
+                return
+        task_info = self.conversion_tasks.pop(task_id)
 
-        yield event.plain_result("没有找到可取消的转换任务")
+        task = task_info["task"]
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # 清理临时文件（并发删除，不阻塞事件循环；文件不存在时忽略）
+        results = await asyncio.gather(
+            *(
+                aiofiles.os.remove(task_info[key])
+                for key in ("input_file", "output_file", "mixed_file")
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, OSError) and not isinstance(result, FileNotFoundError):
+                logger.error(f"清理临时文件失败: {str(result)}")
+        yield event.plain_result("已取消转换任务")
 
     @permission_type(PermissionType.ADMIN)
     @command("svc_speakers", alias={"说话人列表"})
@@ -2429,8 +2704,7 @@ class SoVitsSvcPlugin(Star):
         示例：/svc_speakers - 显示说话人列表
               /svc_speakers 1 - 设置默认说话人为1
         """
-        message = event.message_str.strip()
-        args = message.split()[1:] if message else []
+        args = self._args(event)
 
         try:
             # 获取可用模型列表
@@ -2446,19 +2720,19 @@ class SoVitsSvcPlugin(Star):
                     return
 
                 self.converter.default_speaker = speaker_id
+                self.converter.invalidate_models_cache()
                 self.config["voice_config"]["default_speaker"] = speaker_id
-                self.config.save_config()
+                self._schedule_save()
                 yield event.plain_result(f"已将默认说话人设置为: {speaker_id}")
                 return
 
-            speaker_info = "下面列出了可用的说话人列表:\n"
-            for i, speaker in enumerate(models, 1):
-                speaker_info += f"{i}. {speaker}\n"
-
-            speaker_info += f"\n当前默认说话人: [{self.converter.default_speaker}]\n"
-            speaker_info += "Tips: 使用 /svc_speakers <说话人ID>，即可设置默认说话人"
+            lines = ["下面列出了可用的说话人列表:"]
+            lines.extend(f"{i}. {speaker}" for i, speaker in enumerate(models, 1))
+            lines.append("")
+            lines.append(f"当前默认说话人: [{self.converter.default_speaker}]")
+            lines.append("Tips: 使用 /svc_speakers <说话人ID>，即可设置默认说话人")
 
-            yield event.plain_result(speaker_info)
+            yield event.plain_result("\n".join(lines))
 
         except Exception as e:
             yield event.plain_result(f"获取说话人列表失败：{str(e)}\n{traceback.format_exc()}")
@@ -2475,14 +2749,13 @@ class SoVitsSvcPlugin(Star):
                 )
                 return
 
-            preset_info = "下面列出了可用的预设列表:\n"
-            for i, preset in enumerate(presets, 1):
-                preset_info += f"{i}. {preset}\n"
+            lines = ["下面列出了可用的预设列表:"]
+            lines.extend(f"{i}. {preset}" for i, preset in enumerate(presets, 1))
+            lines.append("")
+            lines.append(f"当前使用的预设: [{self.converter.msst_preset}]")
+            lines.append("Tips: 使用 /svc_presets 可以查看所有可用的预设")
 
-            preset_info += f"\n当前使用的预设: [{self.converter.msst_preset}]\n"
-            preset_info += "Tips: 使用 /svc_presets 可以查看所有可用的预设"
-
-            yield event.plain_result(preset_info)
+            yield event.plain_result("\n".join(lines))
 
         except Exception as e:
             yield event.plain_result(f"获取预设列表失败：{str(e)}\n{traceback.format_exc()}")
@@ -2493,8 +2766,7 @@ class SoVitsSvcPlugin(Star):
 
         用法：/bilibili_info [BV号或链接]
         """
-        message = event.message_str.strip()
-        args = message.split()[1:] if message else []
+        args = self._args(event)
 
         if not args:
             yield event.plain_result("请提供视频BV号或链接！\n用法：/bilibili_info [BV号或链接]")
@@ -2507,7 +2779,9 @@ class SoVitsSvcPlugin(Star):
 
             cookie = self.config.get("base_setting", {}).get("bbdown_cookie", "")
             bvid = extract_bvid(url_or_bvid)
-            video_info = await bilibili_api.fetch_bilibili_video_info(bvid, cookie=cookie)
+            video_info = await bilibili_api.fetch_bilibili_video_info(
+                bvid, cookie=cookie, session=await self.converter.get_session()
+            )
 
             if not video_info:
                 yield event.plain_result(f"获取视频信息失败：{url_or_bvid}")
@@ -2553,8 +2827,7 @@ class SoVitsSvcPlugin(Star):
 
         用法：/qqmusic_info [歌曲名]
         """
-        message = event.message_str.strip()
-        args = message.split()[1:] if message else []
+        args = self._args(event)
 
         if not args:
             yield event.plain_result("请提供歌曲名！\n用法：/qqmusic_info [歌曲名]")
@@ -2577,7 +2850,7 @@ class SoVitsSvcPlugin(Star):
                 yield event.plain_result(f"未找到QQ音乐歌曲：{song_name}")
                 return
 
-            result = f"找到 {len(search_results)} 首相关歌曲：\n\n"
+            lines = [f"找到 {len(search_results)} 首相关歌曲：", ""]
 
             for i, song in enumerate(search_results, 1):
                 song_name = song.get("name", "未知歌曲")
@@ -2585,15 +2858,16 @@ class SoVitsSvcPlugin(Star):
                 album_name = song.get("album", {}).get("name", "未知专辑")
                 duration = song.get("interval", "未知时长")
 
-                result += f"{i}. {song_name} - {singer_name}\n"
-                result += f"   专辑：{album_name}\n"
-                result += f"   时长：{duration}秒\n\n"
+                lines.append(f"{i}. {song_name} - {singer_name}")
+                lines.append(f"   专辑：{album_name}")
+                lines.append(f"   时长：{duration}秒")
+                lines.append("")
 
-            result += "使用方法：\n"
-            result += f"/唱 [说话人ID] [音调调整] qq {song_name}\n"
-            result += f"或使用默认参数：/唱 qq {song_name}"
+            lines.append("使用方法：")
+            lines.append(f"/唱 [说话人ID] [音调调整] qq {song_name}")
+            lines.append(f"或使用默认参数：/唱 qq {song_name}")
 
-            yield event.plain_result(result)
+            yield event.plain_result("\n".join(lines))
 
         except Exception as e:
             logger.error(f"获取QQ音乐歌曲信息出错: {str(e)}\n{traceback.format_exc()}")
@@ -2605,8 +2879,7 @@ class SoVitsSvcPlugin(Star):
 
         用法：/douyin_info [抖音视频链接或包含链接的文本]
         """
-        message = event.message_str.strip()
-        args = message.split()[1:] if message else []
+        args = self._args(event)
 
         if not args:
             yield event.plain_result("请提供抖音视频链接！\n用法：/douyin_info [抖音视频链接或包含链接的文本]")
@@ -2685,8 +2958,7 @@ class SoVitsSvcPlugin(Star):
 
         用法：/douyin_download [抖音视频链接或包含链接的文本] [自定义文件名(可选)]
         """
-        message = event.message_str.strip()
-        args = message.split()[1:] if message else []
+        args = self._args(event)
 
         if not args:
             yield event.plain_result("请提供抖音视频链接！\n用法：/douyin_download [抖音视频链接或包含链接的文本] [自定义文件名(可选)]")
@@ -2762,8 +3034,7 @@ class SoVitsSvcPlugin(Star):
         示例：/svc_models - 显示模型列表
               /svc_models default - 设置默认模型目录为default
         """
-        message = event.message_str.strip()
-        args = message.split()[1:] if message else []
+        args = self._args(event)
 
         try:
             models = await self.converter.get_available_models()
@@ -2784,8 +3055,9 @@ class SoVitsSvcPlugin(Star):
                     return
 
                 self.converter.model_dir = model_dir
+                self.converter.invalidate_models_cache()
                 self.config["base_setting"]["model_dir"] = model_dir
-                self.config.save_config()
+                self._schedule_save()
                 if self.converter.svc_backend == "ddsp_reflow":
                     yield event.plain_result(
                         f"已将默认 speaker 文件夹（model_dir）设置为: {model_dir}"
@@ -2795,22 +3067,22 @@ class SoVitsSvcPlugin(Star):
                 return
 
             if self.converter.svc_backend == "ddsp_reflow":
-                model_info = "DDSP Reflow：以下为服务端 REFLOW_MODELS_DIR 下可解析的 speaker 文件夹：\n"
+                lines = ["DDSP Reflow：以下为服务端 REFLOW_MODELS_DIR 下可解析的 speaker 文件夹："]
             else:
-                model_info = "下面列出了可用的模型目录:\n"
-            for i, model in enumerate(models, 1):
-                model_info += f"{i}. {model}\n"
+                lines = ["下面列出了可用的模型目录:"]
+            lines.extend(f"{i}. {model}" for i, model in enumerate(models, 1))
 
-            model_info += f"\n当前默认 model_dir: [{self.converter.model_dir}]\n"
+            lines.append("")
+            lines.append(f"当前默认 model_dir: [{self.converter.model_dir}]")
             if self.converter.svc_backend == "ddsp_reflow":
-                model_info += (
+                lines.append(
                     "Tips: /svc_models <名> 设置默认 model_dir；"
                     "文件夹名→API speaker，.pt/路径→API model_ckpt；default 时用默认说话人作 speaker"
                 )
             else:
-                model_info += "Tips: 使用 /svc_models <模型目录名>，即可设置默认模型目录"
+                lines.append("Tips: 使用 /svc_models <模型目录名>，即可设置默认模型目录")
 
-            yield event.plain_result(model_info)
+            yield event.plain_result("\n".join(lines))
 
         except Exception as e:
             yield event.plain_result(f"获取模型列表失败：{str(e)}\n{traceback.format_exc()}")
@@ -2860,6 +3132,58 @@ def get_chorus_cache_key(source_type, song_info, input_file):
     else:
         return input_file, False
 
+def _remove_file_quietly(path: str) -> None:
+    """删除文件，文件不存在或删除失败时只记录日志"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(f"清理临时文件失败: {path}, {str(e)}")
+
+def _list_files(directory: str) -> Set[str]:
+    """列出目录下的普通文件名，os.scandir 的 DirEntry 自带类型信息，无需逐个 stat"""
+    with os.scandir(directory) as it:
+        return {entry.name for entry in it if entry.is_file(follow_symlinks=False)}
+
+def _move_file(src: str, dst: str) -> None:
+    """移动文件：优先 os.replace（同一文件系统只改目录项），跨文件系统时回退为复制后删除源文件"""
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+        os.remove(src)
+
+def cut_audio_segment(input_path: str, output_path: str, start: float, end: float) -> None:
+    """截取音频片段并保存为 16 位 WAV
+
+    优先用 soundfile 按帧定位只读取所需区间；格式不受 libsndfile 支持时（如 m4a）回退到 pydub
+
+    Args:
+        input_path: 输入音频文件路径
+        output_path: 输出 WAV 文件路径
+        start: 起始时间（秒）
+        end: 结束时间（秒）
+    """
+    try:
+        import soundfile as sf
+
+        sr = sf.info(input_path).samplerate
+        data, _ = sf.read(
+            input_path,
+            start=int(start * sr),
+            stop=int(end * sr),
+            dtype="int16",
+            always_2d=True,
+        )
+        sf.write(output_path, data, sr, subtype="PCM_16")
+    except Exception as e:
+        logger.info(f"soundfile 截取失败，回退到 pydub: {str(e)}")
+        from pydub import AudioSegment
+
+        audio = AudioSegment.from_file(input_path)
+        audio[int(start * 1000):int(end * 1000)].export(output_path, format="wav")
+
 def extract_bvid(text):
     """从文本或URL中提取BV号"""
     match = re.search(r"(BV[0-9A-Za-z]+)", text)
@@ -2904,7 +3228,9 @@ class BilibiliVideoInfoTool(FunctionTool[AstrAgentContext]):
         try:
             cookie = plugin.config.get("base_setting", {}).get("bbdown_cookie", "")
             bvid = extract_bvid(bvid_or_url)
-            video_info = await bilibili_api.fetch_bilibili_video_info(bvid, cookie=cookie)
+            video_info = await bilibili_api.fetch_bilibili_video_info(
+                bvid, cookie=cookie, session=await plugin.converter.get_session()
+            )
             if not video_info:
                 return f"获取视频信息失败：{bvid_or_url}，请检查 BV 号或链接是否正确。"
             lines = [
@@ -3123,10 +3449,11 @@ class SvcSpeakersTool(FunctionTool[AstrAgentContext]):
                 if speaker_id not in models:
                     return f"说话人 {speaker_id} 不存在。可用说话人：{', '.join(models)}"
                 plugin.converter.default_speaker = speaker_id
+                plugin.converter.invalidate_models_cache()
                 if "voice_config" not in plugin.config:
                     plugin.config["voice_config"] = {}
                 plugin.config["voice_config"]["default_speaker"] = speaker_id
-                plugin.config.save_config()
+                plugin._schedule_save()
                 return f"已将默认说话人设置为：{speaker_id}"
             lines = ["当前可用的说话人列表："]
             for i, speaker in enumerate(models, 1):
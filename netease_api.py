@@ -7,19 +7,71 @@
 """
 
 import aiohttp
+import asyncio
+import itertools
 import json
 import os
-import urllib.parse
+import time
+from collections import OrderedDict
 from hashlib import md5
 from random import randrange
-from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from typing import Dict, Optional
 
+# 可选依赖：安装 orjson 后用其解析响应（可直接解析 bytes），未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# eapi 参数加密使用固定密钥的 AES-128-ECB，密钥与 Cipher 对象只需构造一次
+EAPI_AES_KEY = b"e82ckenh8dichen8"
+_EAPI_CIPHER = Cipher(algorithms.AES(EAPI_AES_KEY), modes.ECB())
+# eapi 请求头中固定不变的设备信息，每次请求只需补上 requestId
+_EAPI_BASE_CONFIG = {"os": "pc", "appver": "", "osver": "", "deviceId": "pyncm!"}
+# requestId 只需唯一，进程内随机起点后递增即可，无需每次生成随机数
+_REQUEST_IDS = itertools.count(randrange(20000000, 29000000))
+
+
+class _TTLCache:
+    """带过期时间的简单 LRU 缓存，超过容量时淘汰最久未使用的条目"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[object, tuple]" = OrderedDict()
+
+    def get(self, key):
+        """返回未过期的缓存值，不存在或已过期返回 None"""
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if time.monotonic() >= expires:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        """写入缓存"""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+
 
 class NeteaseMusicAPI:
     """网易云音乐API类"""
 
+    # 下载歌曲时每次读取的块大小，无损音源通常有几十 MB，块太小会放大循环与系统调用开销
+    DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
     def __init__(self, config: Optional[Dict] = None):
         """初始化API
 
@@ -30,6 +82,37 @@ class NeteaseMusicAPI:
         self.cookies = self._parse_cookie(
             self.config.get("base_setting", {}).get("netease_cookie", "")
         )
+        # eapi 请求固定携带的 cookie，只在初始化时合并一次
+        self._eapi_cookies = {**_EAPI_BASE_CONFIG, **self.cookies}
+        self.session: Optional[aiohttp.ClientSession] = None
+        # 歌词与歌曲详情不会变化，缓存较久；搜索结果随榜单变化，缓存较短
+        self._lyric_cache = _TTLCache(maxsize=512, ttl=3600)
+        self._detail_cache = _TTLCache(maxsize=512, ttl=3600)
+        self._search_cache = _TTLCache(maxsize=256, ttl=300)
+
+    def clear_cache(self):
+        """清空搜索、歌曲详情和歌词缓存"""
+        self._lyric_cache.clear()
+        self._detail_cache.clear()
+        self._search_cache.clear()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取复用的 HTTP 会话，未创建或已关闭时重新创建
+
+        cookie 由每个请求显式传入，会话本身不保存服务端下发的 cookie，保持与单次请求相同的行为
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=16, ttl_dns_cache=300, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(
+                connector=connector, cookie_jar=aiohttp.DummyCookieJar()
+            )
+        return self.session
+
+    async def close(self):
+        """关闭 HTTP 会话"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
 
     def _parse_cookie(self, text):
         """解析cookie字符串为字典，忽略无等号或空段"""
@@ -45,19 +128,6 @@ class NeteaseMusicAPI:
                     cookie_[k] = v
         return cookie_
 
-    def _hex_digest(self, data):
-        """将字节数据转换为十六进制字符串"""
-        return "".join([hex(d)[2:].zfill(2) for d in data])
-
-    def _hash_digest(self, text):
-        """计算文本的MD5摘要"""
-        HASH = md5(text.encode("utf-8"))
-        return HASH.digest()
-
-    def _hash_hex_digest(self, text):
-        """计算文本的MD5摘要并转换为十六进制字符串"""
-        return self._hex_digest(self._hash_digest(text))
-
     # 仅接受 gzip/deflate，避免服务端返回 br 导致 aiohttp 无法解码（需 brotli 依赖）
     _COMMON_HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Safari/537.36 Chrome/91.0.4472.164 NeteaseMusicDesktop/2.10.2.200154",
@@ -65,20 +135,66 @@ class NeteaseMusicAPI:
         "Accept-Encoding": "gzip, deflate",
     }
 
+    # eapi 接口地址及其参与签名的 /api/ 路径（即把地址中的 /eapi/ 换成 /api/），直接写死免去每次解析 URL
+    SEARCH_API = "https://interface3.music.163.com/eapi/search/get"
+    SEARCH_API_PATH = b"/api/search/get"
+    # 获取歌曲下载链接的 eapi 接口
+    SONG_URL_API = "https://interface3.music.163.com/eapi/song/enhance/player/url/v1"
+    SONG_URL_API_PATH = b"/api/song/enhance/player/url/v1"
+
+    def _encrypt_params(self, api_path, payload):
+        """生成 eapi 请求的加密 params
+
+        Args:
+            api_path: 参与签名的接口路径（bytes），如 SEARCH_API_PATH
+            payload: 请求参数字典
+
+        Returns:
+            加密后的十六进制字符串
+        """
+        return self._encrypt_params_batch(api_path, [payload])[0]
+
+    def _encrypt_params_batch(self, api_path, payloads):
+        """批量生成同一 eapi 接口的加密 params
+
+        ECB 模式各分组独立加密，把多份填充后的明文拼接后一次加密再按长度切分，
+        结果与逐个加密完全相同
+
+        Args:
+            api_path: 参与签名的接口路径（bytes），如 SONG_URL_API_PATH
+            payloads: 请求参数字典列表
+
+        Returns:
+            与 payloads 一一对应的加密十六进制字符串列表
+        """
+        # 全程按 bytes 拼接（json.dumps 默认输出 ASCII），不再构造中间字符串再编码
+        blobs = []
+        for payload in payloads:
+            payload_bytes = json.dumps(payload).encode()
+            digest = md5(b"nobody" + api_path + b"use" + payload_bytes + b"md5forencrypt").hexdigest()
+            data = b"-36cd479b6b5-".join((api_path, payload_bytes, digest.encode()))
+            # PKCS7 填充直接拼接字节
+            pad = 16 - len(data) % 16
+            blobs.append(data + bytes([pad]) * pad)
+        # ECB 模式 finalize 不产生输出，一次 update 即可
+        enc = _EAPI_CIPHER.encryptor().update(b"".join(blobs))
+        results = []
+        offset = 0
+        for blob in blobs:
+            results.append(enc[offset:offset + len(blob)].hex())
+            offset += len(blob)
+        return results
+
     async def _post(self, url, params):
-        """发送POST请求"""
-        headers = dict(self._COMMON_HEADERS)
-        cookies = {"os": "pc", "appver": "", "osver": "", "deviceId": "pyncm!"}
-        cookies.update(self.cookies)
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                url,
-                headers=headers,
-                cookies=cookies,
-                data={"params": params}
-            ) as response:
-                return await response.text()
+        """发送POST请求，返回原始响应体（bytes）"""
+        session = await self.get_session()
+        async with session.post(
+            url,
+            headers=self._COMMON_HEADERS,
+            cookies=self._eapi_cookies,
+            data={"params": params}
+        ) as response:
+            return await response.read()
 
     async def search(self, keyword, limit=30):
         """搜索歌曲
@@ -90,15 +206,12 @@ class NeteaseMusicAPI:
         Returns:
             搜索结果列表，每个元素包含歌曲ID、名称、歌手、专辑等信息
         """
-        url = "https://interface3.music.163.com/eapi/search/get"
-        AES_KEY = b"e82ckenh8dichen8"
-        config = {
-            "os": "pc",
-            "appver": "",
-            "osver": "",
-            "deviceId": "pyncm!",
-            "requestId": str(randrange(20000000, 30000000)),
-        }
+        cache_key = (keyword, limit)
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        config = {**_EAPI_BASE_CONFIG, "requestId": str(next(_REQUEST_IDS))}
 
         payload = {
             "hlpretag": '<span class="s-fc7">',
@@ -111,25 +224,15 @@ class NeteaseMusicAPI:
             "header": json.dumps(config),
         }
 
-        url2 = urllib.parse.urlparse(url).path.replace("/eapi/", "/api/")
-        digest = self._hash_hex_digest(
-            f"nobody{url2}use{json.dumps(payload)}md5forencrypt"
-        )
-        params = f"{url2}-36cd479b6b5-{json.dumps(payload)}-36cd479b6b5-{digest}"
-        padder = padding.PKCS7(algorithms.AES(AES_KEY).block_size).padder()
-        padded_data = padder.update(params.encode()) + padder.finalize()
-        cipher = Cipher(algorithms.AES(AES_KEY), modes.ECB())
-        encryptor = cipher.encryptor()
-        enc = encryptor.update(padded_data) + encryptor.finalize()
-        params = self._hex_digest(enc)
+        params = self._encrypt_params(self.SEARCH_API_PATH, payload)
 
-        response_text = await self._post(url, params)
+        response_text = await self._post(self.SEARCH_API, params)
 
         try:
-            result = json.loads(response_text)
+            result = _json_loads(response_text)
             if "result" in result and "songs" in result["result"]:
                 songs = result["result"]["songs"]
-                return [
+                results = [
                     {
                         "id": song.get("id"),
                         "name": song.get("name", "未知歌曲"),
@@ -145,9 +248,12 @@ class NeteaseMusicAPI:
                     for song in songs
                     if song.get("id") and song.get("name")
                 ]  # 只返回有效数据
+                if results:
+                    self._search_cache.set(cache_key, results)
+                return results
             return []
         except json.JSONDecodeError:
-            print(f"解析JSON失败，响应内容: {response_text[:100]}...")
+            print(f"解析JSON失败，响应内容: {response_text[:100].decode(errors='replace')}...")
             return []
 
     async def get_song_url(self, song_id, level="lossless"):
@@ -160,15 +266,12 @@ class NeteaseMusicAPI:
         Returns:
             歌曲下载链接和大小信息
         """
-        url = "https://interface3.music.163.com/eapi/song/enhance/player/url/v1"
-        AES_KEY = b"e82ckenh8dichen8"
-        config = {
-            "os": "pc",
-            "appver": "",
-            "osver": "",
-            "deviceId": "pyncm!",
-            "requestId": str(randrange(20000000, 30000000)),
-        }
+        params = self._encrypt_params(self.SONG_URL_API_PATH, self._song_url_payload(song_id, level))
+        return await self._request_song_url(params)
+
+    def _song_url_payload(self, song_id, level):
+        """构造获取歌曲下载链接的请求参数"""
+        config = {**_EAPI_BASE_CONFIG, "requestId": str(next(_REQUEST_IDS))}
 
         payload = {
             "ids": [song_id],
@@ -179,23 +282,21 @@ class NeteaseMusicAPI:
 
         if level == "sky":
             payload["immerseType"] = "c51"
+        return payload
 
-        url2 = urllib.parse.urlparse(url).path.replace("/eapi/", "/api/")
-        digest = self._hash_hex_digest(
-            f"nobody{url2}use{json.dumps(payload)}md5forencrypt"
-        )
-        params = f"{url2}-36cd479b6b5-{json.dumps(payload)}-36cd479b6b5-{digest}"
-        padder = padding.PKCS7(algorithms.AES(AES_KEY).block_size).padder()
-        padded_data = padder.update(params.encode()) + padder.finalize()
-        cipher = Cipher(algorithms.AES(AES_KEY), modes.ECB())
-        encryptor = cipher.encryptor()
-        enc = encryptor.update(padded_data) + encryptor.finalize()
-        params = self._hex_digest(enc)
+    async def _request_song_url(self, params):
+        """用已加密的 params 请求歌曲下载链接
+
+        Args:
+            params: _encrypt_params 生成的加密参数
 
-        response_text = await self._post(url, params)
+        Returns:
+            歌曲下载链接和大小信息，失败返回 None
+        """
+        response_text = await self._post(self.SONG_URL_API, params)
 
         try:
-            result = json.loads(response_text)
+            result = _json_loads(response_text)
             if "data" in result and result["data"] and result["data"][0]["url"]:
                 return {
                     "url": result["data"][0]["url"],
@@ -204,7 +305,7 @@ class NeteaseMusicAPI:
                 }
             return None
         except json.JSONDecodeError:
-            print(f"解析JSON失败，响应内容: {response_text[:100]}...")
+            print(f"解析JSON失败，响应内容: {response_text[:100].decode(errors='replace')}...")
             return None
 
     async def get_song_detail(self, song_id):
@@ -216,23 +317,27 @@ class NeteaseMusicAPI:
         Returns:
             歌曲详细信息，包括名称、歌手、专辑等
         """
+        cached = self._detail_cache.get(song_id)
+        if cached is not None:
+            return cached
+
         url = "https://interface3.music.163.com/api/v3/song/detail"
         data = {"c": json.dumps([{"id": song_id, "v": 0}])}
-        headers = dict(self._COMMON_HEADERS)
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url=url, data=data, headers=headers) as response:
-                # 关键：忽略content_type
-                result = await response.json(content_type=None)
+        session = await self.get_session()
+        async with session.post(url=url, data=data, headers=self._COMMON_HEADERS) as response:
+            # 关键：忽略content_type
+            result = await response.json(content_type=None, loads=_json_loads)
 
         if "songs" in result and result["songs"]:
             song = result["songs"][0]
-            return {
+            detail = {
                 "name": song["name"],
                 "artists": [artist["name"] for artist in song["ar"]],
                 "album": song["al"]["name"],
                 "picUrl": song["al"]["picUrl"],
             }
+            self._detail_cache.set(song_id, detail)
+            return detail
         return None
 
     async def get_lyric(self, song_id):
@@ -244,6 +349,10 @@ class NeteaseMusicAPI:
         Returns:
             歌词信息，包括原文歌词和翻译歌词
         """
+        cached = self._lyric_cache.get(song_id)
+        if cached is not None:
+            return cached
+
         url = "https://interface3.music.163.com/api/song/lyric"
         data = {
             "id": song_id,
@@ -256,17 +365,29 @@ class NeteaseMusicAPI:
             "ytv": "0",
             "yrv": "0",
         }
-        headers = dict(self._COMMON_HEADERS)
-
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url=url, data=data, cookies=self.cookies, headers=headers) as response:
-                response_text = await response.text()
-                try:
-                    result = json.loads(response_text)
-                    return result
-                except json.JSONDecodeError:
-                    print(f"解析歌词JSON失败，响应内容: {response_text[:100]}...")
-                    return None
+        session = await self.get_session()
+        async with session.post(url=url, data=data, cookies=self.cookies, headers=self._COMMON_HEADERS) as response:
+            response_text = await response.read()
+        try:
+            result = _json_loads(response_text)
+            if result:
+                self._lyric_cache.set(song_id, result)
+            return result
+        except json.JSONDecodeError:
+            print(f"解析歌词JSON失败，响应内容: {response_text[:100].decode(errors='replace')}...")
+            return None
+
+    _MUSIC_LEVELS = {
+        "standard": "标准音质",
+        "exhigh": "极高音质",
+        "lossless": "无损音质",
+        "hires": "Hires音质",
+        "sky": "沉浸环绕声",
+        "jyeffect": "高清环绕声",
+        "jymaster": "超清母带",
+    }
+
+    _SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
 
     def get_music_level(self, value):
         """获取音质描述
@@ -277,16 +398,7 @@ class NeteaseMusicAPI:
         Returns:
             音质描述
         """
-        levels = {
-            "standard": "标准音质",
-            "exhigh": "极高音质",
-            "lossless": "无损音质",
-            "hires": "Hires音质",
-            "sky": "沉浸环绕声",
-            "jyeffect": "高清环绕声",
-            "jymaster": "超清母带",
-        }
-        return levels.get(value, "未知音质")
+        return self._MUSIC_LEVELS.get(value, "未知音质")
 
     def format_size(self, value):
         """格式化文件大小
@@ -297,13 +409,10 @@ class NeteaseMusicAPI:
         Returns:
             格式化后的文件大小
         """
-        units = ["B", "KB", "MB", "GB", "TB", "PB"]
-        size = 1024.0
-        for i in range(len(units)):
-            if (value / size) < 1:
-                return "%.2f%s" % (value, units[i])
-            value = value / size
-        return value
+        # 由整数位数直接得出单位档位（每 10 位一档），避免逐级除法循环
+        exp = (int(value).bit_length() - 1) // 10 if value >= 1 else 0
+        exp = min(exp, len(self._SIZE_UNITS) - 1)
+        return "%.2f%s" % (value / (1 << (10 * exp)), self._SIZE_UNITS[exp])
 
     async def get_song_with_highest_quality(self, keyword):
         """获取搜索到的第一首歌曲的最高音质版本
@@ -325,11 +434,19 @@ class NeteaseMusicAPI:
         first_song = songs[0]
         song_id = first_song["id"]
 
-        # 优先尝试无损音质，兜底次高音质
+        # 优先尝试无损音质，兜底次高音质；各音质的加密参数一次批量生成
         qualities = ["lossless", "exhigh", "standard"]
-        for quality in qualities:
-            url_info = await self.get_song_url(song_id, quality)
-            if url_info:
+        params_list = self._encrypt_params_batch(
+            self.SONG_URL_API_PATH, [self._song_url_payload(song_id, q) for q in qualities]
+        )
+        # 各音质并发请求，再按优先级取第一个可用结果
+        results = await asyncio.gather(
+            *(self._request_song_url(params) for params in params_list),
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        for url_info in results:
+            if url_info and not isinstance(url_info, BaseException):
                 song_url = url_info["url"]
                 song_size = url_info["size"]
                 song_level = url_info["level"]
@@ -344,15 +461,18 @@ class NeteaseMusicAPI:
                     "size": self.format_size(song_size),
                     "url": song_url
                 }
+        if len(errors) == len(results):
+            raise errors[0]
         print("获取无损及次高音质失败")
         return None
 
-    async def download_song(self, song_info, save_path=None):
+    async def download_song(self, song_info, save_path=None, target_path=None):
         """下载歌曲
 
         Args:
             song_info: 歌曲信息，包含url和name字段
             save_path: 保存路径，默认为当前目录
+            target_path: 直接写入的目标文件路径，指定时忽略 save_path，省去下载后再移动
 
         Returns:
             下载的文件路径
@@ -364,7 +484,9 @@ class NeteaseMusicAPI:
         download_url = song_info["url"]
         song_name = song_info["name"]
 
-        if save_path:
+        if target_path:
+            file_path = target_path
+        elif save_path:
             if not os.path.exists(save_path):
                 os.makedirs(save_path)
             file_path = os.path.join(save_path, f"{song_name}.mp3")
@@ -372,25 +494,22 @@ class NeteaseMusicAPI:
             file_path = f"{song_name}.mp3"
 
         print(f"开始下载 {song_name}...")
-        headers = dict(self._COMMON_HEADERS)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(download_url, headers=headers) as response:
-                if response.status == 200:
-                    with open(file_path, "wb") as f:
-                        async for chunk in response.content.iter_chunked(8192):
-                            if chunk:
-                                f.write(chunk)
-                    print(f"歌曲已下载到 {file_path}")
-                    return file_path
-                else:
-                    print("下载失败")
-                    return None
+        session = await self.get_session()
+        async with session.get(download_url, headers=self._COMMON_HEADERS) as response:
+            if response.status == 200:
+                with open(file_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                print(f"歌曲已下载到 {file_path}")
+                return file_path
+            else:
+                print("下载失败")
+                return None
 
 
 # 使用示例
 if __name__ == "__main__":
     import argparse
-    import asyncio
 
     parser = argparse.ArgumentParser(description="网易云音乐API工具")
     parser.add_argument("keyword", help="搜索关键词")
@@ -409,5 +528,6 @@ if __name__ == "__main__":
         # 如果需要下载歌曲
         if args.download and song:
             await api.download_song(song, args.save_path)
+        await api.close()
 
     asyncio.run(main())
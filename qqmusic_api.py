@@ -12,18 +12,57 @@ import asyncio
 import httpx
 import anyio
 import base64
-import shutil
 import time
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 from astrbot.core import logger
 from .QQapi.qqmusic_api import search, song
 from .QQapi.qqmusic_api.login import get_qrcode, check_qrcode, QRLoginType, QRCodeLoginEvents
 from .QQapi.qqmusic_api.utils.credential import Credential
 from .QQapi.qqmusic_api.login import check_expired, refresh_cookies
+from .QQapi.qqmusic_api.exceptions import CredentialExpiredError, CredentialInvalidError, LoginError
 from quart import Quart, Response
 from aiohttp import web
 import aiofiles
 
+# 插件目录、QQapi 目录与二维码文件路径，只在导入时解析一次
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_QQAPI_DIR = os.path.join(_BASE_DIR, "QQapi")
+_QR_PATH = os.path.join(_QQAPI_DIR, "login_qr.png")
+
+# 按音质从高到低排列的候选文件类型
+FILE_TYPE_LADDER = (
+    song.SongFileType.FLAC,      # 无损
+    song.SongFileType.OGG_640,   # 640kbps
+    song.SongFileType.OGG_320,   # 320kbps
+    song.SongFileType.MP3_320,   # 320kbps
+    song.SongFileType.ACC_192,   # 192kbps
+    song.SongFileType.MP3_128,   # 128kbps
+    song.SongFileType.ACC_96,    # 96kbps
+    song.SongFileType.ACC_48,    # 48kbps
+)
+
+_QUALITY_NAMES = {
+    song.SongFileType.FLAC: "无损",
+    song.SongFileType.OGG_640: "640kbps",
+    song.SongFileType.OGG_320: "320kbps",
+    song.SongFileType.MP3_320: "320kbps",
+    song.SongFileType.ACC_192: "192kbps",
+    song.SongFileType.MP3_128: "128kbps",
+    song.SongFileType.ACC_96: "96kbps",
+    song.SongFileType.ACC_48: "48kbps"
+}
+
+_FILE_EXTENSIONS = {
+    song.SongFileType.FLAC: ".flac",
+    song.SongFileType.OGG_640: ".ogg",
+    song.SongFileType.OGG_320: ".ogg",
+    song.SongFileType.MP3_320: ".mp3",
+    song.SongFileType.ACC_192: ".m4a",
+    song.SongFileType.MP3_128: ".mp3",
+    song.SongFileType.ACC_96: ".m4a",
+    song.SongFileType.ACC_48: ".m4a"
+}
+
 # 全局凭证文件锁，防止多进程/多线程并发写入
 _credential_file_lock = asyncio.Lock()
 
@@ -36,12 +75,13 @@ class QQMusicRoute:
     async def get_qr(self):
         """获取QQ音乐登录二维码"""
         try:
-            qr_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "QQapi", "login_qr.png")
-            if not os.path.exists(qr_path):
+            qr_path = _QR_PATH
+            if not await asyncio.to_thread(os.path.exists, qr_path):
                 return Response("二维码不存在", status=404)
 
-            with open(qr_path, "rb") as f:
-                return Response(f.read(), mimetype="image/png")
+            async with aiofiles.open(qr_path, "rb") as f:
+                data = await f.read()
+            return Response(data, mimetype="image/png")
         except Exception as e:
             logger.error(f"获取二维码失败: {str(e)}")
             return Response("获取二维码失败", status=500)
@@ -50,6 +90,13 @@ class QQMusicRoute:
 class QQMusicAPI:
     """QQ音乐API类"""
 
+    # 凭证通过有效性检测后，在该时间（秒）内不再重复请求 check_expired
+    CREDENTIAL_CHECK_TTL = 300.0
+    # 距凭证到期不足该时间（秒）时视为即将过期，照常返回并在后台提前刷新
+    CREDENTIAL_STALE_MARGIN = 1800.0
+    # 下载歌曲时每次写入的块大小，块越大异步写入的线程切换与系统调用越少
+    DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
     def __init__(self, config: Optional[Dict] = None):
         """初始化API
 
@@ -58,15 +105,41 @@ class QQMusicAPI:
         """
         self.config = config or {}
         self.credential_file = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "QQapi",
+            _QQAPI_DIR,
             "qqmusic_credential.json"
         )
         self.credential = None
         self.credential_lock = asyncio.Lock()
+        # 正在进行的登录/刷新流程，并发调用方共享同一个任务，避免重复检测与刷新
+        self._login_task: Optional[asyncio.Task] = None
+        # 上次确认凭证有效的时间（time.monotonic），0 表示需要重新检测
+        self._last_valid_at = 0.0
+        # 凭证到期时间（Unix 时间戳），0 表示未知，此时退回按 check_expired 检测
+        self._expires_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        # 凭证文件当前内容，与待写入内容相同时跳过写盘
+        self._last_saved_json: Optional[str] = None
+        # 最近一次获取的二维码图像，二维码服务直接从内存返回
+        self._qr_png_bytes: Optional[bytes] = None
         self.qr_server = None
         self.qr_server_port = 8081  # 使用8081端口避免与主服务器冲突
 
+    def get_http_client(self) -> httpx.AsyncClient:
+        """获取复用的 HTTP 客户端，未创建或已关闭时重新创建"""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=20),
+            )
+        return self._http
+
+    async def close(self):
+        """关闭 HTTP 客户端"""
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+        self._http = None
+
     async def start_qr_server(self):
         """启动二维码服务器"""
         app = web.Application()
@@ -87,63 +160,26 @@ class QQMusicAPI:
 
     async def handle_qr(self, request):
         """处理二维码请求"""
+        if self._qr_png_bytes:
+            return web.Response(body=self._qr_png_bytes, content_type="image/png")
         try:
-            qr_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "QQapi", "login_qr.png")
-            if not os.path.exists(qr_path):
+            qr_path = _QR_PATH
+            if not await asyncio.to_thread(os.path.exists, qr_path):
                 return web.Response(text="二维码不存在", status=404)
 
-            with open(qr_path, "rb") as f:
-                return web.Response(body=f.read(), content_type="image/png")
+            async with aiofiles.open(qr_path, "rb") as f:
+                data = await f.read()
+            return web.Response(body=data, content_type="image/png")
         except Exception as e:
             logger.error(f"获取二维码失败: {str(e)}")
             return web.Response(text="获取二维码失败", status=500)
 
-    def _cleanup_qr_path(self, qr_path: str) -> bool:
-        """清理二维码路径
-        Args:
-            qr_path: 二维码文件路径
-        Returns:
-            bool: 是否清理成功
-        """
-        try:
-            if os.path.exists(qr_path):
-                if os.path.isdir(qr_path):
-                    logger.info(f"正在删除目录: {qr_path}")
-                    shutil.rmtree(qr_path)
-                else:
-                    logger.info(f"正在删除文件: {qr_path}")
-                    os.remove(qr_path)
-                # 等待一小段时间确保文件系统操作完成
-                time.sleep(0.1)
-                return True
-            return True
-        except Exception as e:
-            logger.error(f"清理二维码路径失败: {str(e)}")
-            return False
-
-    def _get_latest_qr_file(self, qr_dir: str) -> Optional[str]:
-        """获取目录中最新的二维码文件
-        Args:
-            qr_dir: 二维码目录路径
-        Returns:
-            最新二维码文件的完整路径，无文件或出错时返回 None
-        """
-        try:
-            # 获取目录中所有的png文件
-            qr_files = [f for f in os.listdir(qr_dir) if f.endswith(".png")]
-            if not qr_files:
-                return None
-
-            # 按修改时间排序，获取最新的文件
-            latest_file = max(qr_files, key=lambda f: os.path.getmtime(os.path.join(qr_dir, f)))
-            return os.path.join(qr_dir, latest_file)
-        except Exception as e:
-            logger.error(f"获取最新二维码文件失败: {str(e)}")
-            return None
-
     def _clear_credential(self):
         """清除本地凭证文件和内存凭证"""
         self.credential = None
+        self._last_valid_at = 0.0
+        self._expires_at = 0.0
+        self._last_saved_json = None
         if os.path.exists(self.credential_file):
             try:
                 os.remove(self.credential_file)
@@ -151,11 +187,15 @@ class QQMusicAPI:
                 logger.error(f"删除凭证文件失败: {str(e)}")
 
     async def _is_credential_valid(self) -> bool:
-        """检测当前凭证是否有效，直接调用check_expired"""
+        """检测当前凭证是否有效，近期检测通过时直接返回，否则调用check_expired"""
         if not self.credential:
             return False
+        if time.monotonic() - self._last_valid_at < self.CREDENTIAL_CHECK_TTL:
+            return True
         try:
             expired = await check_expired(self.credential)
+            if not expired:
+                self._last_valid_at = time.monotonic()
             return not expired
         except Exception as e:
             logger.warning(f"凭证有效性检测失败: {str(e)}")
@@ -174,6 +214,9 @@ class QQMusicAPI:
             refreshed = await refresh_cookies(self.credential)
             if refreshed:
                 logger.info("凭证刷新成功")
+                self._last_valid_at = time.monotonic()
+                self._expires_at = self._credential_expires_at(self.credential)
+                await self._save_credential(self.credential)
                 return True
             else:
                 logger.warning("凭证刷新失败，refresh_cookies返回False")
@@ -188,14 +231,79 @@ class QQMusicAPI:
             self._clear_credential()
             self.credential = None
             logger.info("已强制清理凭证，准备扫码登录")
-            await self.ensure_login()
+        await self.ensure_login()
 
     async def ensure_login(self) -> bool:
         """确保已登录QQ音乐
 
+        同一时刻只运行一个登录流程，其余调用方等待同一个任务的结果
+
         Returns:
             是否登录成功
         """
+        if self.credential and self._expires_at:
+            remaining = self._expires_at - time.time()
+            if remaining > self.CREDENTIAL_STALE_MARGIN:
+                return True
+            if remaining > 0:
+                # 即将过期：不阻塞调用方，后台提前刷新
+                self._schedule_background_refresh()
+                return True
+
+        if self._login_task is None or self._login_task.done():
+            self._login_task = asyncio.create_task(self._do_login_flow())
+        # shield：某个调用方被取消时不影响其他调用方共享的登录流程
+        return await asyncio.shield(self._login_task)
+
+    def _schedule_background_refresh(self):
+        """启动后台凭证刷新，已有刷新或登录流程进行中时不重复启动"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if self._login_task is not None and not self._login_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    async def _background_refresh(self):
+        """凭证即将过期时在后台刷新"""
+        async with self.credential_lock:
+            if await self._refresh_credential():
+                return
+            # 刷新失败时放弃到期时间判断，交由下次 ensure_login 按常规流程检测
+            self._expires_at = 0.0
+        logger.warning("后台刷新QQ音乐凭证失败，将在下次使用时重新检测")
+
+    @staticmethod
+    def _credential_expires_at(credential: Credential) -> float:
+        """根据登录接口返回的 musickeyCreateTime 与 keyExpiresIn 计算凭证到期时间
+
+        Args:
+            credential: 登录凭证
+
+        Returns:
+            到期时间（Unix 时间戳），缺少字段时返回 0
+        """
+        extra = getattr(credential, "extra_fields", None) or {}
+        try:
+            return float(extra["musickeyCreateTime"]) + float(extra["keyExpiresIn"])
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+
+    async def _do_login_flow(self) -> bool:
+        """检测/刷新凭证，失败时扫码登录
+
+        Returns:
+            是否登录成功
+        """
+        if await self._load_or_refresh():
+            return True
+        return await self._perform_qr_login()
+
+    async def _load_or_refresh(self) -> bool:
+        """检测内存中或本地保存的凭证，过期时尝试刷新
+
+        Returns:
+            是否已有可用凭证
+        """
         async with self.credential_lock:
             if self.credential:
                 # 检查凭证有效性
@@ -226,90 +334,102 @@ class QQMusicAPI:
                         logger.info("凭证刷新失败或无法刷新，清理本地凭证，准备重新登录")
                         self._clear_credential()
                         self.credential = None
+            return False
 
-            # 需要重新登录
-            logger.info("正在获取QQ音乐登录二维码...")
-            try:
-                # 获取QQ登录二维码
-                qr = await get_qrcode(QRLoginType.QQ)
-
-                # 保存二维码到QQapi目录
-                current_dir = os.path.dirname(os.path.abspath(__file__))
-                qr_dir = os.path.join(current_dir, "QQapi")
-
-                # 确保目录存在
-                if not os.path.exists(qr_dir):
-                    os.makedirs(qr_dir)
-
-                # 保存新二维码
-                try:
-                    qr_path = qr.save(qr_dir)  # 使用QR对象自带的save方法，它会返回保存的文件路径
-                    logger.info(f"二维码已保存到: {qr_path}")
-                except Exception as e:
-                    logger.error(f"保存二维码失败: {str(e)}")
-                    return False
+    async def _perform_qr_login(self) -> bool:
+        """扫码登录
 
-                if qr_path is None:
-                    logger.error("保存二维码未返回文件路径")
-                    return False
+        轮询扫码状态期间不持有 credential_lock，只在写入新凭证时加锁
 
-                # 读取二维码文件并转换为base64
-                try:
-                    if not os.path.isfile(qr_path):
-                        logger.error(f"二维码文件不存在或不是文件: {qr_path}")
-                        return False
-
-                    with open(qr_path, "rb") as f:
-                        qr_base64 = base64.b64encode(f.read()).decode()
-                        base64_url = f"data:image/png;base64,{qr_base64}"
-                        logger.info("请复制以下链接到浏览器打开二维码:")
-                        logger.info(base64_url)
-                        # 同时输出到控制台，方便复制
-                        print("\n请复制以下链接到浏览器打开二维码:")
-                        print(base64_url)
-                        print()  # 添加空行使输出更清晰
-                except Exception as e:
-                    logger.error(f"读取二维码文件失败: {str(e)}")
-                    return False
+        Returns:
+            是否登录成功
+        """
+        logger.info("正在获取QQ音乐登录二维码...")
+        try:
+            # 获取QQ登录二维码
+            qr = await get_qrcode(QRLoginType.QQ)
 
-                logger.info("请使用QQ音乐APP扫描二维码")
+            # 保存二维码到QQapi目录
+            qr_dir = _QQAPI_DIR
 
-                # 等待扫码
-                while True:
-                    event, credential = await check_qrcode(qr)
-                    if event == QRCodeLoginEvents.DONE and credential:
-                        logger.info("QQ音乐登录成功！")
-                        # 保存凭证
-                        await self._save_credential(credential)
-                        self.credential = credential
-                        return True
-                    elif event == QRCodeLoginEvents.SCAN:
-                        logger.info("等待扫码...")
-                    elif event == QRCodeLoginEvents.CONF:
-                        logger.info("已扫码，等待确认...")
-                    elif event == QRCodeLoginEvents.TIMEOUT:
-                        logger.error("二维码已过期，请重新登录")
-                        return False
-                    elif event == QRCodeLoginEvents.REFUSE:
-                        logger.error("已拒绝登录")
-                        return False
-                    await asyncio.sleep(2)
+            # 确保目录存在
+            await asyncio.to_thread(os.makedirs, qr_dir, exist_ok=True)
+
+            # 保存新二维码
+            try:
+                qr_path = await asyncio.to_thread(qr.save, qr_dir)  # 使用QR对象自带的save方法，它会返回保存的文件路径
+                logger.info(f"二维码已保存到: {qr_path}")
             except Exception as e:
-                logger.error(f"QQ音乐登录出错: {str(e)}")
+                logger.error(f"保存二维码失败: {str(e)}")
                 return False
 
+            if qr_path is None:
+                logger.error("保存二维码未返回文件路径")
+                return False
+
+            # 二维码图像已在 qr.data 中，直接转换为base64，无需再读回文件
+            self._qr_png_bytes = qr.data
+            qr_base64 = base64.b64encode(qr.data).decode()
+            base64_url = f"data:image/png;base64,{qr_base64}"
+            logger.info("请复制以下链接到浏览器打开二维码:")
+            logger.info(base64_url)
+            # 同时输出到控制台，方便复制
+            print("\n请复制以下链接到浏览器打开二维码:")
+            print(base64_url)
+            print()  # 添加空行使输出更清晰
+
+            logger.info("请使用QQ音乐APP扫描二维码")
+
+            # 等待扫码
+            while True:
+                event, credential = await check_qrcode(qr)
+                if event in (QRCodeLoginEvents.DONE, QRCodeLoginEvents.TIMEOUT, QRCodeLoginEvents.REFUSE):
+                    # 二维码已失效，不再对外提供
+                    self._qr_png_bytes = None
+                if event == QRCodeLoginEvents.DONE and credential:
+                    logger.info("QQ音乐登录成功！")
+                    # 保存凭证，仅写入时加锁
+                    async with self.credential_lock:
+                        self._expires_at = self._credential_expires_at(credential)
+                        await self._save_credential(credential)
+                        self.credential = credential
+                        self._last_valid_at = time.monotonic()
+                    return True
+                elif event == QRCodeLoginEvents.SCAN:
+                    logger.info("等待扫码...")
+                elif event == QRCodeLoginEvents.CONF:
+                    logger.info("已扫码，等待确认...")
+                elif event == QRCodeLoginEvents.TIMEOUT:
+                    logger.error("二维码已过期，请重新登录")
+                    return False
+                elif event == QRCodeLoginEvents.REFUSE:
+                    logger.error("已拒绝登录")
+                    return False
+                await asyncio.sleep(2)
+        except Exception as e:
+            logger.error(f"QQ音乐登录出错: {str(e)}")
+            return False
+
     async def _save_credential(self, credential: Credential):
         """异步保存登录凭证到文件"""
         data = {
             "musicid": getattr(credential, "musicid", None),
             "musickey": getattr(credential, "musickey", None),
             "refresh_key": getattr(credential, "refresh_key", None),
-            "refresh_token": getattr(credential, "refresh_token", None)
+            "refresh_token": getattr(credential, "refresh_token", None),
+            "expires_at": self._expires_at or None
         }
+        content = json.dumps(data)
+        if content == self._last_saved_json:
+            return
+        # 先写临时文件再原子替换，写入中断也不会留下残缺的凭证文件
+        tmp_file = self.credential_file + ".tmp"
         try:
             async with _credential_file_lock:
-                async with aiofiles.open(self.credential_file, "w", encoding="utf-8") as f:
-                    await f.write(json.dumps(data))
+                async with aiofiles.open(tmp_file, "w", encoding="utf-8") as f:
+                    await f.write(content)
+                await asyncio.to_thread(os.replace, tmp_file, self.credential_file)
+            self._last_saved_json = content
         except Exception as e:
             logger.error(f"保存QQ音乐凭证出错: {str(e)}，数据: {data}")
 
@@ -322,6 +442,7 @@ class QQMusicAPI:
                 async with aiofiles.open(self.credential_file, "r", encoding="utf-8") as f:
                     content = await f.read()
                     data = json.loads(content)
+            self._last_saved_json = content
             # 字段兼容性检查
             musicid = data.get("musicid")
             musickey = data.get("musickey")
@@ -336,6 +457,7 @@ class QQMusicAPI:
                 setattr(cred, "refresh_key", refresh_key)
             if refresh_token:
                 setattr(cred, "refresh_token", refresh_token)
+            self._expires_at = float(data.get("expires_at") or 0)
             return cred
         except Exception as e:
             logger.error(f"加载QQ音乐凭证出错: {str(e)}，文件内容可能损坏或权限不足")
@@ -365,24 +487,11 @@ class QQMusicAPI:
             return []
 
         try:
-            search_result = await search.search_by_type(keyword=keyword, num=limit)
+            search_result = await self._with_relogin_retry(
+                lambda: search.search_by_type(keyword=keyword, num=limit)
+            )
             return search_result or []
         except Exception as e:
-            # 检查是否凭证失效
-            err_msg = str(e)
-            if any(x in err_msg for x in ["未登录", "musickey", "凭证", "登录失效", "登录过期"]):
-                logger.warning("检测到凭证失效，自动清理并重试登录")
-                self._clear_credential()
-                if await self.ensure_login():
-                    try:
-                        search_result = await search.search_by_type(keyword=keyword, num=limit)
-                        return search_result or []
-                    except Exception as e2:
-                        logger.error(f"QQ音乐搜索重试仍失败: {str(e2)}")
-                        return []
-                else:
-                    logger.error("QQ音乐重新登录失败")
-                    return []
             logger.error(f"QQ音乐搜索出错: {str(e)}")
             return []
 
@@ -401,91 +510,74 @@ class QQMusicAPI:
             return None
 
         try:
-            # 如果未指定音质类型，则尝试不同音质
-            if file_type is None:
-                file_types = [
-                    song.SongFileType.FLAC,      # 无损
-                    song.SongFileType.OGG_640,   # 640kbps
-                    song.SongFileType.OGG_320,   # 320kbps
-                    song.SongFileType.MP3_320,   # 320kbps
-                    song.SongFileType.ACC_192,   # 192kbps
-                    song.SongFileType.MP3_128,   # 128kbps
-                    song.SongFileType.ACC_96,    # 96kbps
-                    song.SongFileType.ACC_48     # 48kbps
-                ]
-
-                for ft in file_types:
-                    try:
-                        urls = await song.get_song_urls(
-                            mid=[song_mid],
-                            credential=self.credential,
-                            file_type=ft
-                        )
-                        if urls and urls.get(song_mid):
-                            return urls[song_mid]
-                    except Exception:
-                        continue
-
-                return None
-            else:
-                # 使用指定的音质类型
-                urls = await song.get_song_urls(
-                    mid=[song_mid],
-                    credential=self.credential,
-                    file_type=file_type
-                )
-                return urls.get(song_mid) if urls else None
-
+            return await self._with_relogin_retry(lambda: self._fetch_song_url(song_mid, file_type))
         except Exception as e:
-            # 检查是否凭证失效
-            err_msg = str(e)
-            if any(x in err_msg for x in ["未登录", "musickey", "凭证", "登录失效", "登录过期"]):
-                logger.warning("检测到凭证失效，自动清理并重试登录")
-                self._clear_credential()
-                if await self.ensure_login():
-                    try:
-                        # 如果未指定音质类型，则尝试不同音质
-                        if file_type is None:
-                            file_types = [
-                                song.SongFileType.FLAC,      # 无损
-                                song.SongFileType.OGG_640,   # 640kbps
-                                song.SongFileType.OGG_320,   # 320kbps
-                                song.SongFileType.MP3_320,   # 320kbps
-                                song.SongFileType.ACC_192,   # 192kbps
-                                song.SongFileType.MP3_128,   # 128kbps
-                                song.SongFileType.ACC_96,    # 96kbps
-                                song.SongFileType.ACC_48     # 48kbps
-                            ]
-
-                            for ft in file_types:
-                                try:
-                                    urls = await song.get_song_urls(
-                                        mid=[song_mid],
-                                        credential=self.credential,
-                                        file_type=ft
-                                    )
-                                    if urls and urls.get(song_mid):
-                                        return urls[song_mid]
-                                except Exception:
-                                    continue
-
-                            return None
-                        else:
-                            urls = await song.get_song_urls(
-                                mid=[song_mid],
-                                credential=self.credential,
-                                file_type=file_type
-                            )
-                            return urls.get(song_mid) if urls else None
-                    except Exception as e2:
-                        logger.error(f"QQ音乐下载链接重试仍失败: {str(e2)}")
-                        return None
-                else:
-                    logger.error("QQ音乐重新登录失败")
-                    return None
             logger.error(f"获取QQ音乐下载链接出错: {str(e)}")
             return None
 
+    async def _with_relogin_retry(self, coro_factory):
+        """执行请求，凭证失效时清理凭证、重新登录并重试一次
+
+        Args:
+            coro_factory: 无参函数，每次调用返回一个新的请求协程
+
+        Returns:
+            请求结果
+
+        Raises:
+            LoginError: 凭证失效且重新登录失败
+        """
+        try:
+            return await coro_factory()
+        except (CredentialExpiredError, CredentialInvalidError):
+            logger.warning("检测到凭证失效，自动清理并重试登录")
+            self._clear_credential()
+            if not await self.ensure_login():
+                raise LoginError("QQ音乐重新登录失败")
+            return await coro_factory()
+
+    async def _fetch_song_url(self, song_mid: str, file_type=None) -> Optional[str]:
+        """获取指定音质的下载链接，未指定音质时取可用的最高音质"""
+        if file_type is None:
+            url, _ = await self._probe_qualities(song_mid)
+            return url
+        urls = await song.get_song_urls(
+            mid=[song_mid],
+            credential=self.credential,
+            file_type=file_type
+        )
+        return urls.get(song_mid) if urls else None
+
+    async def _probe_qualities(self, song_mid: str) -> Tuple[Optional[str], Optional[song.SongFileType]]:
+        """并发查询各音质的下载链接，按 FILE_TYPE_LADDER 顺序取第一个可用结果
+
+        Args:
+            song_mid: 歌曲mid
+
+        Returns:
+            (下载链接, 音质类型)，均不可用时返回 (None, None)
+        """
+        results = await asyncio.gather(
+            *[
+                song.get_song_urls(mid=[song_mid], credential=self.credential, file_type=ft)
+                for ft in FILE_TYPE_LADDER
+            ],
+            return_exceptions=True,
+        )
+        credential_error = None
+        for ft, urls in zip(FILE_TYPE_LADDER, results):
+            if isinstance(urls, (CredentialExpiredError, CredentialInvalidError)):
+                credential_error = credential_error or urls
+                continue
+            if isinstance(urls, BaseException):
+                continue
+            if urls and urls.get(song_mid):
+                return urls[song_mid], ft
+        # 没有可用链接且凭证失效时抛出，交由调用方重新登录
+        if credential_error is not None:
+            raise credential_error
+        return None, None
+
     def get_quality_name(self, file_type) -> str:
         """获取音质名称
 
@@ -495,17 +587,7 @@ class QQMusicAPI:
         Returns:
             音质名称
         """
-        quality_map = {
-            song.SongFileType.FLAC: "无损",
-            song.SongFileType.OGG_640: "640kbps",
-            song.SongFileType.OGG_320: "320kbps",
-            song.SongFileType.MP3_320: "320kbps",
-            song.SongFileType.ACC_192: "192kbps",
-            song.SongFileType.MP3_128: "128kbps",
-            song.SongFileType.ACC_96: "96kbps",
-            song.SongFileType.ACC_48: "48kbps"
-        }
-        return quality_map.get(file_type, "未知音质")
+        return _QUALITY_NAMES.get(file_type, "未知音质")
 
     def get_file_extension(self, file_type) -> str:
         """获取文件扩展名
@@ -516,17 +598,7 @@ class QQMusicAPI:
         Returns:
             文件扩展名
         """
-        extension_map = {
-            song.SongFileType.FLAC: ".flac",
-            song.SongFileType.OGG_640: ".ogg",
-            song.SongFileType.OGG_320: ".ogg",
-            song.SongFileType.MP3_320: ".mp3",
-            song.SongFileType.ACC_192: ".m4a",
-            song.SongFileType.MP3_128: ".mp3",
-            song.SongFileType.ACC_96: ".m4a",
-            song.SongFileType.ACC_48: ".m4a"
-        }
-        return extension_map.get(file_type, ".mp3")
+        return _FILE_EXTENSIONS.get(file_type, ".mp3")
 
     async def get_song_with_highest_quality(self, keyword: str) -> Optional[Dict]:
         """获取最高音质的歌曲信息
@@ -546,38 +618,13 @@ class QQMusicAPI:
         song_name = song_info["name"]
         singer_name = song_info.get("singer", [{}])[0].get("name", "未知歌手")
 
-        # 尝试获取下载链接
-        url = await self.get_song_url(song_mid)
-        if not url:
+        # 一次并发探测同时得到下载链接与对应音质
+        try:
+            url, used_type = await self._with_relogin_retry(lambda: self._probe_qualities(song_mid))
+        except Exception as e:
+            logger.error(f"获取QQ音乐下载链接出错: {str(e)}")
             return None
-
-        # 获取音质信息
-        file_types = [
-            song.SongFileType.FLAC,
-            song.SongFileType.OGG_640,
-            song.SongFileType.OGG_320,
-            song.SongFileType.MP3_320,
-            song.SongFileType.ACC_192,
-            song.SongFileType.MP3_128,
-            song.SongFileType.ACC_96,
-            song.SongFileType.ACC_48
-        ]
-
-        used_type = None
-        for file_type in file_types:
-            try:
-                urls = await song.get_song_urls(
-                    mid=[song_mid],
-                    credential=self.credential,
-                    file_type=file_type
-                )
-                if urls and urls.get(song_mid):
-                    used_type = file_type
-                    break
-            except Exception:
-                continue
-
-        if not used_type:
+        if not url:
             return None
 
         # 构建返回信息
@@ -605,7 +652,7 @@ class QQMusicAPI:
             return None
 
         if not save_path:
-            save_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "temp")
+            save_path = os.path.join(_BASE_DIR, "temp")
             os.makedirs(save_path, exist_ok=True)
 
         try:
@@ -613,13 +660,12 @@ class QQMusicAPI:
             extension = song_info.get("extension", ".mp3")
             file_path = os.path.join(save_path, f"{song_name}{extension}")
 
-            async with httpx.AsyncClient() as client:
-                async with client.stream("GET", song_info["url"]) as response:
-                    response.raise_for_status()
-                    async with await anyio.open_file(file_path, "wb") as f:
-                        async for chunk in response.aiter_bytes(1024 * 5):
-                            if chunk:
-                                await f.write(chunk)
+            client = self.get_http_client()
+            async with client.stream("GET", song_info["url"]) as response:
+                response.raise_for_status()
+                async with await anyio.open_file(file_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(self.DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
 
             return file_path
         except Exception as e:
@@ -1,4 +1,4 @@
-import datetime
+import functools
 import hashlib
 import hmac
 from urllib.parse import quote
@@ -7,6 +7,7 @@ import base64
 import httpx
 import asyncio
 import sys
+import time
 
 
 
@@ -15,26 +16,49 @@ Version = "2021-07-27"
 Region = "cn-north-1"
 Host = "open.volcengineapi.com"
 ContentType = "application/json"
+SignedHeaders = "content-type;host;x-content-sha256;x-date"
+
+# 复用的 HTTP 客户端，避免每次请求重新建立 TCP/TLS 连接
+_client = None
+
+def _get_client():
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient()
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
 
 def norm_query(params):
-    query = ""
+    parts = []
     for key in sorted(params.keys()):
-        if isinstance(params[key], list):
-            for k in params[key]:
-                query = (
-                        query + quote(key, safe="-_.~") + "=" + quote(k, safe="-_.~") + "&"
-                )
+        qkey = quote(key, safe="-_.~")
+        value = params[key]
+        if isinstance(value, list):
+            parts.extend(qkey + "=" + quote(k, safe="-_.~") for k in value)
         else:
-            query = (query + quote(key, safe="-_.~") + "=" + quote(str(params[key]), safe="-_.~") + "&")
-    query = query[:-1]
-    return query.replace("+", "%20")
+            parts.append(qkey + "=" + quote(str(value), safe="-_.~"))
+    return "&".join(parts).replace("+", "%20")
 
 def hmac_sha256(key: bytes, content: str):
-    return hmac.new(key, content.encode("utf-8"), hashlib.sha256).digest()
+    # hmac.digest 走 OpenSSL 的一次性实现，不创建 HMAC 对象
+    return hmac.digest(key, content.encode("utf-8"), "sha256")
 
 def hash_sha256(content: str):
     return hashlib.sha256(content.encode("utf-8")).hexdigest()
 
+# 签名密钥只取决于 sk、日期、区域和服务，同一天内的请求可直接复用
+@functools.lru_cache(maxsize=8)
+def signing_key(sk: str, short_x_date: str, region: str, service: str) -> bytes:
+    k_date = hmac_sha256(sk.encode("utf-8"), short_x_date)
+    k_region = hmac_sha256(k_date, region)
+    k_service = hmac_sha256(k_region, service)
+    return hmac_sha256(k_service, "request")
+
 async def volc_request(method, date, query, header, ak, sk, action, body):
     credential = {
         "access_key_id": ak,
@@ -53,7 +77,9 @@ async def volc_request(method, date, query, header, ak, sk, action, body):
     }
     if body is None:
         request_param["body"] = ""
-    x_date = request_param["date"].strftime("%Y%m%dT%H%M%SZ")
+    # date 为 UTC 的 time.struct_time，格式固定，直接拼接数字，不走 strftime
+    t = request_param["date"]
+    x_date = f"{t.tm_year:04d}{t.tm_mon:02d}{t.tm_mday:02d}T{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d}Z"
     short_x_date = x_date[:8]
     x_content_sha256 = hash_sha256(request_param["body"])
     sign_result = {
@@ -62,9 +88,7 @@ async def volc_request(method, date, query, header, ak, sk, action, body):
         "X-Date": x_date,
         "Content-Type": request_param["content_type"],
     }
-    signed_headers_str = ";".join(
-        ["content-type", "host", "x-content-sha256", "x-date"]
-    )
+    signed_headers_str = SignedHeaders
     canonical_request_str = "\n".join(
         [request_param["method"].upper(),
          request_param["path"],
@@ -85,10 +109,9 @@ async def volc_request(method, date, query, header, ak, sk, action, body):
     hashed_canonical_request = hash_sha256(canonical_request_str)
     credential_scope = "/".join([short_x_date, credential["region"], credential["service"], "request"])
     string_to_sign = "\n".join(["HMAC-SHA256", x_date, credential_scope, hashed_canonical_request])
-    k_date = hmac_sha256(credential["secret_access_key"].encode("utf-8"), short_x_date)
-    k_region = hmac_sha256(k_date, credential["region"])
-    k_service = hmac_sha256(k_region, credential["service"])
-    k_signing = hmac_sha256(k_service, "request")
+    k_signing = signing_key(
+        credential["secret_access_key"], short_x_date, credential["region"], credential["service"]
+    )
     signature = hmac_sha256(k_signing, string_to_sign).hex()
     sign_result["Authorization"] = "HMAC-SHA256 Credential={}, SignedHeaders={}, Signature={}".format(
         credential["access_key_id"] + "/" + credential_scope,
@@ -96,29 +119,46 @@ async def volc_request(method, date, query, header, ak, sk, action, body):
         signature,
     )
     header = {**header, **sign_result}
-    async with httpx.AsyncClient() as client:
-        resp = await client.request(
-            method=method,
-            url=f"https://{request_param['host']}{request_param['path']}",
-            headers=header,
-            params=request_param["query"],
-            content=request_param["body"]
-        )
-        return resp.json()
+    resp = await _get_client().request(
+        method=method,
+        url=f"https://{request_param['host']}{request_param['path']}",
+        headers=header,
+        params=request_param["query"],
+        content=request_param["body"]
+    )
+    return resp.json()
+
+# SAMI token 有效期（秒）；按 (ak, sk, appkey) 缓存，提前 TokenRefreshMargin 秒视为过期
+TokenExpiration = 3600
+TokenRefreshMargin = 60
+_sami_token_cache = {}
+_sami_token_lock = asyncio.Lock()
 
 async def get_sami_token(ak, sk, appkey):
-    now = datetime.datetime.now(datetime.timezone.utc)
-    body = json.dumps({
-        "appkey": appkey,
-        "token_version": "volc-auth-v1",
-        "expiration": 3600
-    })
-    resp = await volc_request("POST", now, {}, {}, ak, sk, "GetToken", body)
-    token = resp.get("token")
-    if not token:
-        return None, resp
-    return token, resp
+    key = (ak, sk, appkey)
+    cached = _sami_token_cache.get(key)
+    if cached and time.monotonic() < cached[2]:
+        return cached[0], cached[1]
+    async with _sami_token_lock:
+        # 等锁期间可能已有其他请求取得 token
+        cached = _sami_token_cache.get(key)
+        if cached and time.monotonic() < cached[2]:
+            return cached[0], cached[1]
+        now = time.gmtime()
+        body = json.dumps({
+            "appkey": appkey,
+            "token_version": "volc-auth-v1",
+            "expiration": TokenExpiration
+        })
+        requested_at = time.monotonic()
+        resp = await volc_request("POST", now, {}, {}, ak, sk, "GetToken", body)
+        token = resp.get("token")
+        if not token:
+            return None, resp
+        _sami_token_cache[key] = (token, resp, requested_at + TokenExpiration - TokenRefreshMargin)
+        return token, resp
 
+# audio_bytes 可以是 bytes、memoryview、mmap 等任意 bytes-like 对象
 async def detect_chorus_api(audio_bytes, volc_conf=None):
     if not volc_conf:
         return {"msg": "需要配置 volc_chorus (ak/sk/appkey)，请在插件配置中设置"}
@@ -128,12 +168,13 @@ async def detect_chorus_api(audio_bytes, volc_conf=None):
     token, token_resp = await get_sami_token(ak, sk, appkey)
     if not token:
         return {"msg": "Token获取失败", "token_resp": token_resp}
-    audio_b64 = base64.b64encode(audio_bytes).decode("utf-8")
-    body = json.dumps({"data": audio_b64})
+    # base64 字符无需 JSON 转义，直接拼出请求体，省去 decode、json.dumps 与再次 encode 的整份拷贝
+    body = b"".join((b'{"data": "', base64.b64encode(audio_bytes), b'"}'))
     url = f"https://sami.bytedance.com/api/v1/invoke?version=v4&token={token}&appkey={appkey}&namespace=DeepChorus"
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(url, content=body.encode("utf-8"), headers={"Content-Type": "application/json"})
+        resp = await _get_client().post(
+            url, content=body, headers={"Content-Type": "application/json"}, timeout=30.0
+        )
     except httpx.ReadTimeout:
         return {"msg": "副歌检测请求超时, 请稍后重试或检查网络/API状态"}
     if resp.status_code != 200:
@@ -170,5 +211,12 @@ if __name__ == "__main__":
     audio_path = sys.argv[1]
     with open(audio_path, "rb") as f:
         audio_bytes = f.read()
-    result = asyncio.run(detect_chorus_api(audio_bytes))
+
+    async def _main():
+        try:
+            return await detect_chorus_api(audio_bytes)
+        finally:
+            await close_client()
+
+    result = asyncio.run(_main())
     print(result)
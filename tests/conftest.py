@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 插件目录本身不是可直接导入的包（依赖 AstrBot 运行时），测试只导入不依赖 AstrBot 的独立模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
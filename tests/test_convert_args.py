@@ -0,0 +1,35 @@
+import pytest
+
+from convert_args import parse_convert_flags
+
+
+def test_flags_are_removed_and_rest_keeps_order():
+    parsed = parse_convert_flags(["0", "-c", "0", "qq", "-m", "my_model", "Song", "-q"])
+    assert parsed.only_chorus
+    assert parsed.quick_cut
+    assert not parsed.no_mix
+    assert parsed.model_dir == "my_model"
+    assert parsed.rest == ["0", "0", "qq", "Song"]
+
+
+def test_song_name_with_unknown_dash_token_is_kept():
+    parsed = parse_convert_flags(["0", "0", "qq", "Song", "-x", "Part", "2"])
+    assert parsed.rest == ["0", "0", "qq", "Song", "-x", "Part", "2"]
+    assert parsed.model_dir is None
+
+
+def test_attached_model_value_is_not_parsed():
+    parsed = parse_convert_flags(["0", "0", "-mystery", "song"])
+    assert parsed.model_dir is None
+    assert parsed.rest == ["0", "0", "-mystery", "song"]
+
+
+def test_dash_prefixed_song_name_keeps_position():
+    parsed = parse_convert_flags(["0", "0", "-nomix", "-", "Remix", "--live"])
+    assert parsed.no_mix
+    assert parsed.rest == ["0", "0", "-", "Remix", "--live"]
+
+
+def test_model_flag_without_value_raises():
+    with pytest.raises(ValueError):
+        parse_convert_flags(["0", "0", "Song", "-m"])
@@ -9,11 +9,44 @@
 
 from __future__ import annotations
 
+import functools
 import json
+import logging
 import os
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+try:
+    from astrbot.core import logger as log
+except ImportError:
+    # 脱离 AstrBot 单独运行（命令行同步配置）时使用标准库 logging
+    log = logging.getLogger(__name__)
+
+# 可选依赖：安装 orjson 后用其直接解析 bytes，未安装时回退到标准库
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+@functools.lru_cache(maxsize=4)
+def _load_json(path: str, mtime_ns: int) -> Any:
+    """按路径与修改时间缓存解析结果，文件被修改后 mtime 变化即自动重新解析。"""
+    return _json_loads(Path(path).read_bytes())
+
+
+def _load_json_cached(path: Path) -> Any:
+    """读取 JSON 文件，顶层为 dict 时返回浅拷贝，调用方修改不会污染缓存。"""
+    data = _load_json(str(path), path.stat().st_mtime_ns)
+    return dict(data) if isinstance(data, dict) else data
+
+
+# AstrBot 侧插件配置路径，导入时计算一次；前者不存在时回退到插件目录下的 config.json
+_HERE = Path(__file__).parent
+_ACTUAL_CONFIG_PATH = _HERE.parent.parent / "config" / "so-vits-svc-api_config.json"
+_FALLBACK_CONFIG_PATH = _HERE / "config.json"
+
 
 def sdk_config_path() -> Path:
     """与 douyin_link_sdk.config.Config.CONFIG_FILE 规则一致。"""
@@ -26,31 +59,32 @@ def sdk_config_path() -> Path:
 def load_actual_config() -> Optional[dict]:
     """加载 AstrBot 侧插件配置（供命令行 main 使用）。"""
     try:
-        config_path = Path(__file__).parent.parent.parent / "config" / "so-vits-svc-api_config.json"
+        config_path = _ACTUAL_CONFIG_PATH
         if not config_path.exists():
-            config_path = Path(__file__).parent / "config.json"
+            config_path = _FALLBACK_CONFIG_PATH
 
         if config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        print(f"配置文件不存在: {config_path}")
+            return _load_json_cached(config_path)
+        log.warning("配置文件不存在: %s", config_path)
         return None
     except Exception as e:
-        print(f"加载配置文件失败: {e}")
+        log.error("加载配置文件失败: %s", e)
         return None
 
 
 def get_douyin_cookie_from_config(config: dict) -> Optional[str]:
     try:
-        base_setting = config.get("base_setting", {})
-        douyin_cookie = base_setting.get("douyin_cookie", "")
+        try:
+            douyin_cookie = config["base_setting"]["douyin_cookie"]
+        except KeyError:
+            douyin_cookie = ""
         if douyin_cookie:
-            print(f"从配置文件中读取到抖音cookie: {douyin_cookie[:50]}...")
+            log.info("从配置文件中读取到抖音cookie: %.50s...", douyin_cookie)
             return douyin_cookie
-        print("在配置文件中没有找到抖音cookie配置")
+        log.warning("在配置文件中没有找到抖音cookie配置")
         return None
     except Exception as e:
-        print(f"提取抖音cookie失败: {e}")
+        log.error("提取抖音cookie失败: %s", e)
         return None
 
 
@@ -63,11 +97,10 @@ def load_config_yaml() -> Optional[Dict[str, Any]]:
     if not path.is_file():
         return {}
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = _load_json_cached(path)
         return data if isinstance(data, dict) else {}
     except Exception as e:
-        print(f"加载抖音 SDK 配置失败: {e}")
+        log.error("加载抖音 SDK 配置失败: %s", e)
         return None
 
 
@@ -78,7 +111,7 @@ def update_config_yaml(config: dict, douyin_cookie: str) -> bool:
         config["cookie"] = ck
         return True
     except Exception as e:
-        print(f"更新配置失败: {e}")
+        log.error("更新配置失败: %s", e)
         return False
 
 
@@ -87,38 +120,56 @@ def save_config_yaml(config: dict) -> bool:
     try:
         path = sdk_config_path()
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-        print(f"已保存抖音 SDK 配置: {path}")
+        # 先写临时文件并落盘，再原子替换，避免写入中断留下残缺的配置
+        tmp_path = path.with_name(path.name + ".tmp")
+        # 先整体序列化再一次写入；json.dump 会按片段逐次调用 write
+        content = json.dumps(config, ensure_ascii=False, indent=2)
+        # 内容与现有文件一致（cookie 未变化）时跳过写入
+        try:
+            if path.read_text(encoding="utf-8") == content:
+                log.info("抖音 SDK 配置未变化，跳过写入: %s", path)
+                return True
+        except OSError:
+            pass
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        log.info("已保存抖音 SDK 配置: %s", path)
         return True
     except Exception as e:
-        print(f"保存抖音 SDK 配置失败: {e}")
+        log.error("保存抖音 SDK 配置失败: %s", e)
+        return False
+
+
+def sync_douyin_cookie(douyin_cookie: str) -> bool:
+    """把 cookie 写入 SDK 配置：加载、更新、保存一次完成，供 main.py 与命令行共用。"""
+    sdk_cfg = load_config_yaml()
+    if sdk_cfg is None:
+        log.error("无法加载已有抖音 SDK 配置")
+        return False
+    if not update_config_yaml(sdk_cfg, douyin_cookie):
         return False
+    return save_config_yaml(sdk_cfg)
 
 
 def main() -> bool:
-    print("开始更新抖音配置...")
+    log.info("开始更新抖音配置...")
     cfg = load_actual_config()
     if not cfg:
-        print("无法加载配置文件，退出")
+        log.error("无法加载配置文件，退出")
         return False
     douyin_cookie = get_douyin_cookie_from_config(cfg)
     if not douyin_cookie:
-        print("没有找到抖音cookie，退出")
-        return False
-    sdk_cfg = load_config_yaml()
-    if sdk_cfg is None:
-        print("无法加载已有抖音 SDK 配置，退出")
-        return False
-    if not update_config_yaml(sdk_cfg, douyin_cookie):
-        print("更新配置失败，退出")
+        log.error("没有找到抖音cookie，退出")
         return False
-    if not save_config_yaml(sdk_cfg):
-        print("保存配置失败，退出")
+    if not sync_douyin_cookie(douyin_cookie):
         return False
-    print("抖音配置更新完成！")
+    log.info("抖音配置更新完成！")
     return True
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()